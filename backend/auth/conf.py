@@ -1,6 +1,6 @@
 from auth.models import TokenModel
 from config.settings import SECRET_KEY
-from core.fastapi.auth import AuthEmail
+from core.fastapi.auth import AuthEmail, TokenRevocationList
 
 AUTH_MODEL = TokenModel
-auth = AuthEmail(SECRET_KEY, AUTH_MODEL)
+auth = AuthEmail(SECRET_KEY, AUTH_MODEL, revocation_list=TokenRevocationList())
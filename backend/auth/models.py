@@ -25,3 +25,7 @@ class UserReadModel(BaseModel):
 class TokenModel(BaseModel):
     email: EmailStr
     role: str
+
+
+class RefreshTokenModel(BaseModel):
+    refresh_token: str
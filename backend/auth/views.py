@@ -4,7 +4,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.conf import auth
 from auth.tables import User
-from auth.models import UserModel, UserReadModel
+from auth.models import RefreshTokenModel, UserModel, UserReadModel
 from config.database_conf import get_session
 from core.sqlalchemy.crud import Crud
 from core.sqlalchemy.orm import Orm
@@ -49,3 +49,15 @@ async def login(
     )
 
     return {"access_token": access_token, "refresh_token": refresh_token}
+
+
+@auth_router.post("/refresh/")
+async def refresh(data: RefreshTokenModel):
+    access_token = auth.refresh_access_token(data.refresh_token)
+
+    return {"access_token": access_token}
+
+
+@auth_router.post("/logout/", status_code=204)
+async def logout(data: RefreshTokenModel):
+    auth.revoke_refresh_token(data.refresh_token)
@@ -0,0 +1,85 @@
+"""
+Micro-benchmark of the per-table Crud plan against per-call mapper introspection.
+
+Nothing is sent to the database, only the Python side of the hot paths is
+timed. DATABASE_URL must be set for the imports but is not connected to:
+
+    DATABASE_URL=postgresql+asyncpg://u:p@localhost/db python -m benchmarks.crud_plan
+"""
+
+import timeit
+
+from sqlalchemy import delete, select
+from sqlalchemy.orm import RelationshipProperty
+
+from core.sqlalchemy.crud import Crud
+from core.sqlalchemy.orm import Orm
+from tables import Cargo, Tariff  # noqa: F401, registers the mappers
+
+NUMBER = 20000
+REPEAT = 5
+
+crud = Crud(Tariff)
+data = {
+    "date": "2024-01-01",
+    "rate": 0.1,
+    "cargos": [{"type": "a", "declared_value": 1}],
+}
+
+
+def get_mtm_relations(table):
+    return {
+        field_name: relation.mapper.class_
+        for field_name, relation in table.__mapper__.relationships.items()
+        if isinstance(relation, RelationshipProperty) and relation.secondary is not None
+    }
+
+
+def create_path_per_call():
+    [column.name for column in Tariff.__table__.columns if column.unique]
+    mtm_relations = get_mtm_relations(Tariff)
+    {key: value for key, value in data.items() if key not in get_mtm_relations(Tariff)}
+    {
+        (related_model, field_name): data[field_name]
+        for field_name, related_model in get_mtm_relations(Tariff).items()
+        if field_name in data
+    }
+    list(mtm_relations)
+
+
+def create_path_plan():
+    tuple(field for field in crud.unique_fields if field in data)
+    Orm.exclude_mtm_fields(Tariff, data)
+    Orm.get_related_fields_dict(Tariff, data)
+    crud.mtm_fields
+
+
+def statements_per_call():
+    retrieve_query = select(Tariff).where(Tariff.id == 1)
+    delete_query = delete(Tariff.__table__).where(Tariff.id == 1).returning(Tariff.id)
+
+    retrieve_query._generate_cache_key()
+    delete_query._generate_cache_key()
+
+
+def statements_plan():
+    crud.retrieve_query._generate_cache_key()
+    crud.delete_query._generate_cache_key()
+
+
+def measure(func):
+    return min(timeit.repeat(func, number=NUMBER, repeat=REPEAT)) / NUMBER * 1e6
+
+
+def main():
+    cases = {
+        "create path introspection": (create_path_per_call, create_path_plan),
+        "retrieve/delete statements": (statements_per_call, statements_plan),
+    }
+
+    for name, (per_call, plan) in cases.items():
+        print(f"{name}: {measure(per_call):.2f} us -> {measure(plan):.2f} us per call")
+
+
+if __name__ == "__main__":
+    main()
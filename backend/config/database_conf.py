@@ -1,14 +1,66 @@
+from contextvars import ContextVar
+from time import perf_counter
+
+from fastapi import Request
+from sqlalchemy import event
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import declarative_base, sessionmaker
 
 from config.settings import DATABASE_URL
+from core.utils.metrics import metrics
 
 Base = declarative_base()
 
 engine = create_async_engine(DATABASE_URL, future=True)
 SessionLocal = sessionmaker(bind=engine, class_=AsyncSession, future=True)
+# Objects stay usable after a unit of work commits and returns the connection
+LazySessionLocal = sessionmaker(
+    bind=engine, class_=AsyncSession, future=True, expire_on_commit=False
+)
+
+connection_usage = ContextVar("connection_usage", default=None)
+
+
+@event.listens_for(engine.sync_engine, "checkout")
+def on_connection_checkout(dbapi_connection, connection_record, connection_proxy):
+    connection_record.info["checkout_time"] = perf_counter()
+
+
+@event.listens_for(engine.sync_engine, "checkin")
+def on_connection_checkin(dbapi_connection, connection_record):
+    checkout_time = connection_record.info.pop("checkout_time", None)
+    usage = connection_usage.get()
+
+    if checkout_time is not None and usage is not None:
+        usage["held"] += perf_counter() - checkout_time
+        usage["checkouts"] += 1
+
+
+async def track_session(request: Request, session_factory):
+    route = getattr(request.scope.get("route"), "path", request.url.path)
+
+    usage = {"held": 0.0, "checkouts": 0}
+    connection_usage.set(usage)
+
+    try:
+        async with session_factory() as session:
+            yield session
+    finally:
+        metrics.observe("db_connection_held_seconds", usage["held"], route=route)
+        metrics.observe("db_connection_checkouts", usage["checkouts"], route=route)
+
+
+async def get_session(request: Request):
+    async for session in track_session(request, SessionLocal):
+        yield session
+
 
+async def get_lazy_session(request: Request):
+    """
+    Session for handlers that do outbound work between queries.
 
-async def get_session():
-    async with SessionLocal() as session:
+    A connection is checked out on the first query only and goes back to the
+    pool when its unit of work (`async with session.begin()`) ends.
+    """
+    async for session in track_session(request, LazySessionLocal):
         yield session
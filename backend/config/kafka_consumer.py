@@ -0,0 +1,199 @@
+import asyncio
+import logging
+from datetime import datetime
+
+from confluent_kafka import Consumer
+from sqlalchemy.dialects.postgresql import insert
+
+from config.database_conf import SessionLocal
+from config.kafka_producer import SERIALIZERS, JsonSerializer
+from config.settings import (
+    KAFKA_AUDIT_BATCH_SIZE,
+    KAFKA_AUDIT_GROUP_ID,
+    KAFKA_AUDIT_LINGER,
+    KAFKA_AUDIT_METRICS_PORT,
+    KAFKA_BROKER_URL,
+    KAFKA_TOPIC,
+)
+from core.utils.metrics import metrics, serve_metrics
+from tables.audit import AuditLog
+
+CONTENT_TYPE_SERIALIZERS = {
+    serializer.content_type: serializer for serializer in SERIALIZERS.values()
+}
+
+
+class AuditConsumer:
+    """
+    Reads tariff events in batches and stores them in the audit_log table.
+
+    Offsets are committed only after the batch is committed to the database,
+    redelivered events are skipped by the unique (topic, partition, offset).
+    `consumer` is any object with the confluent_kafka.Consumer batch API.
+    """
+
+    def __init__(
+        self,
+        consumer,
+        session_factory=SessionLocal,
+        batch_size: int = KAFKA_AUDIT_BATCH_SIZE,
+        linger: float = KAFKA_AUDIT_LINGER,
+    ):
+        self.consumer = consumer
+        self.session_factory = session_factory
+        self.batch_size = batch_size
+        self.linger = linger
+
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def get_serializer(message):
+        headers = dict(message.headers() or [])
+        content_type = headers.get("content_type", b"").decode()
+
+        return CONTENT_TYPE_SERIALIZERS.get(content_type, JsonSerializer)
+
+    @staticmethod
+    def parse_timestamp(value):
+        try:
+            return datetime.fromisoformat(value)
+        except (TypeError, ValueError):
+            return None
+
+    def get_audit_row(self, message):
+        event = self.get_serializer(message).loads(message.value())
+
+        return {
+            "user_id": event.get("user_id"),
+            "action": event["action"],
+            "tariff_id": event.get("tariff_id"),
+            "payload": event,
+            "event_timestamp": self.parse_timestamp(event.get("timestamp")),
+            "topic": message.topic(),
+            "partition": message.partition(),
+            "offset": message.offset(),
+        }
+
+    def get_valid_messages(self, messages: list):
+        valid_messages = []
+
+        for message in messages:
+            if message.error():
+                self.logger.error(f"Kafka consumer error: {message.error()}")
+            else:
+                valid_messages.append(message)
+
+        return valid_messages
+
+    def get_audit_rows(self, messages: list):
+        rows = []
+
+        for message in messages:
+            try:
+                rows.append(self.get_audit_row(message))
+            except Exception as e:
+                metrics.inc("audit_consumer_invalid_total")
+                self.logger.error(
+                    f"Failed to decode audit event at offset {message.offset()}: {e}"
+                )
+
+        return rows
+
+    async def save_rows(self, rows: list):
+        stmt = (
+            insert(AuditLog)
+            .values(rows)
+            .on_conflict_do_nothing(constraint="unique_audit_offset")
+        )
+
+        async with self.session_factory() as session:
+            await session.execute(stmt)
+            await session.commit()
+
+    def update_lag(self):
+        partitions = self.consumer.position(self.consumer.assignment())
+        total_lag = 0
+
+        for partition in partitions:
+            _, high = self.consumer.get_watermark_offsets(partition, cached=True)
+
+            if partition.offset >= 0 and high >= 0:
+                total_lag += high - partition.offset
+                metrics.set(
+                    "audit_consumer_lag",
+                    high - partition.offset,
+                    partition=partition.partition,
+                )
+
+        return total_lag
+
+    async def consume_batch(self):
+        messages = await asyncio.to_thread(
+            self.consumer.consume, self.batch_size, self.linger
+        )
+        messages = self.get_valid_messages(messages)
+
+        if not messages:
+            return 0
+
+        if rows := self.get_audit_rows(messages):
+            await self.save_rows(rows)
+
+        await asyncio.to_thread(self.consumer.commit, asynchronous=False)
+
+        metrics.inc("audit_consumer_events_total", len(rows))
+        metrics.observe("audit_consumer_batch_size", len(messages))
+        lag = self.update_lag()
+
+        self.logger.info(
+            f"Stored {len(rows)} audit events from {len(messages)} messages, "
+            f"lag {lag}"
+        )
+
+        return len(messages)
+
+    async def run(self):
+        self.running = True
+
+        try:
+            while self.running:
+                await self.consume_batch()
+        finally:
+            self.consumer.close()
+
+    def stop(self):
+        self.running = False
+
+
+async def run(consumer):
+    server = None
+
+    if KAFKA_AUDIT_METRICS_PORT:
+        server = await serve_metrics(KAFKA_AUDIT_METRICS_PORT)
+
+    try:
+        await AuditConsumer(consumer).run()
+    finally:
+        if server is not None:
+            server.close()
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    consumer = Consumer(
+        {
+            "bootstrap.servers": KAFKA_BROKER_URL,
+            "group.id": KAFKA_AUDIT_GROUP_ID,
+            "enable.auto.commit": False,
+            "auto.offset.reset": "earliest",
+        }
+    )
+    consumer.subscribe([KAFKA_TOPIC])
+
+    asyncio.run(run(consumer))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,75 @@
+from datetime import date, datetime
+
+import msgpack
+import orjson
 from confluent_kafka import Producer
 import logging
 
 
+class JsonSerializer:
+    content_type = "application/json"
+
+    @staticmethod
+    def dumps(message: dict) -> bytes:
+        return orjson.dumps(message)
+
+    @staticmethod
+    def loads(value: bytes) -> dict:
+        return orjson.loads(value)
+
+
+class MsgpackSerializer:
+    content_type = "application/msgpack"
+
+    @staticmethod
+    def default(value):
+        if isinstance(value, (date, datetime)):
+            return value.isoformat()
+
+        raise TypeError(f"Object of type {type(value).__name__} is not serializable")
+
+    @classmethod
+    def dumps(cls, message: dict) -> bytes:
+        return msgpack.packb(message, default=cls.default)
+
+    @staticmethod
+    def loads(value: bytes) -> dict:
+        return msgpack.unpackb(value)
+
+
+SERIALIZERS = {
+    "json": JsonSerializer,
+    "msgpack": MsgpackSerializer,
+}
+
+
 class KafkaProducer:
-    def __init__(self, broker_url, topic):
+    schema_version = 1
+
+    def __init__(self, broker_url, topic, serializer="json", compression="lz4"):
         self.topic = topic
-        self.producer = Producer({"bootstrap.servers": broker_url})
+        self.serializer = SERIALIZERS[serializer]
+        self.producer = Producer(
+            {"bootstrap.servers": broker_url, "compression.type": compression}
+        )
         self.logger = logging.getLogger(__name__)
 
-    def send_message(self, message: dict):
+    def get_headers(self):
+        return {
+            "schema_version": str(self.schema_version),
+            "content_type": self.serializer.content_type,
+        }
+
+    def send_message(self, message: dict, key=None):
+        if key is None:
+            key = message.get("user_id")
+
         try:
             self.producer.produce(
-                self.topic, key=str(message.get("user_id")), value=str(message)
+                self.topic,
+                key=str(key),
+                value=self.serializer.dumps(message),
+                headers=self.get_headers(),
             )
             self.producer.flush()
             self.logger.info(f"Message sent to Kafka: {message}")
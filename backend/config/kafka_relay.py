@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import threading
+import uuid
+from typing import Callable
+
+from confluent_kafka import Consumer
+
+from config.kafka_consumer import CONTENT_TYPE_SERIALIZERS
+from config.kafka_producer import JsonSerializer
+from config.settings import KAFKA_BROKER_URL, KAFKA_STREAM_GROUP_PREFIX, KAFKA_TOPIC
+from core.utils.metrics import metrics
+
+
+class KafkaEventRelay:
+    """
+    Passes every event of the topic to `callback` on the event loop.
+
+    Each API process reads the whole topic with its own consumer group from
+    the latest offset, so events produced by any API worker or by the job
+    worker reach the subscribers of every process. Nothing is committed, a
+    restarted process only gets new events. `consumer_factory` returns any
+    object with the confluent_kafka.Consumer batch API, it is created and
+    polled in a thread of its own.
+    """
+
+    def __init__(
+        self,
+        consumer_factory: Callable,
+        callback: Callable[[dict], None],
+        batch_size: int = 100,
+        timeout: float = 1.0,
+    ):
+        self.consumer_factory = consumer_factory
+        self.callback = callback
+        self.batch_size = batch_size
+        self.timeout = timeout
+
+        self.stopped = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def decode(self, message):
+        headers = dict(message.headers() or [])
+        content_type = headers.get("content_type", b"").decode()
+        serializer = CONTENT_TYPE_SERIALIZERS.get(content_type, JsonSerializer)
+
+        return serializer.loads(message.value())
+
+    def relay(self, loop: asyncio.AbstractEventLoop):
+        consumer = self.consumer_factory()
+
+        try:
+            while not self.stopped.is_set():
+                for message in consumer.consume(self.batch_size, self.timeout):
+                    if message.error():
+                        self.logger.error(f"Kafka relay error: {message.error()}")
+                        continue
+
+                    try:
+                        event = self.decode(message)
+                    except Exception as e:
+                        metrics.inc("kafka_relay_invalid_total")
+                        self.logger.error(
+                            f"Failed to decode event at offset {message.offset()}: {e}"
+                        )
+                        continue
+
+                    loop.call_soon_threadsafe(self.callback, event)
+        finally:
+            consumer.close()
+
+    async def run(self):
+        self.stopped.clear()
+
+        try:
+            await asyncio.to_thread(self.relay, asyncio.get_running_loop())
+        finally:
+            # A cancelled run leaves the thread polling until it sees the flag
+            self.stopped.set()
+
+
+def create_stream_consumer():
+    consumer = Consumer(
+        {
+            "bootstrap.servers": KAFKA_BROKER_URL,
+            "group.id": f"{KAFKA_STREAM_GROUP_PREFIX}-{uuid.uuid4().hex}",
+            "enable.auto.commit": False,
+            "auto.offset.reset": "latest",
+        }
+    )
+    consumer.subscribe([KAFKA_TOPIC])
+
+    return consumer
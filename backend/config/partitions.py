@@ -0,0 +1,54 @@
+import argparse
+import asyncio
+
+from config.database_conf import SessionLocal
+from config.settings import REPORTS_USE_MATVIEW
+from core.sqlalchemy.partitions import YearPartitions
+from tables.reports import insured_value_daily_view
+
+tariff_partitions = YearPartitions("tariffs", [("cargo_tariff", "tariff_date")])
+
+
+async def create_partitions(args):
+    async with SessionLocal() as session:
+        try:
+            years = await tariff_partitions.create_ahead(session, args.ahead)
+        except ValueError as e:
+            raise SystemExit(str(e))
+
+    print(f"Tariff partitions exist for years {years}")
+
+
+async def archive_partitions(args):
+    async with SessionLocal() as session:
+        years = await tariff_partitions.archive_before(
+            session, args.before, args.schema, args.drop
+        )
+
+    if years and REPORTS_USE_MATVIEW:
+        await insured_value_daily_view.refresh()
+
+    action = "Dropped" if args.drop else f"Moved to schema {args.schema}"
+    print(f"{action} tariff partitions for years {years}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tariff partitions maintenance")
+    commands = parser.add_subparsers(required=True)
+
+    create_parser = commands.add_parser("create", help="Create future partitions")
+    create_parser.add_argument("--ahead", type=int, default=2)
+    create_parser.set_defaults(handler=create_partitions)
+
+    archive_parser = commands.add_parser("archive", help="Detach old partitions")
+    archive_parser.add_argument("--before", type=int, required=True)
+    archive_parser.add_argument("--schema", default="archive")
+    archive_parser.add_argument("--drop", action="store_true")
+    archive_parser.set_defaults(handler=archive_partitions)
+
+    args = parser.parse_args()
+    asyncio.run(args.handler(args))
+
+
+if __name__ == "__main__":
+    main()
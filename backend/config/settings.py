@@ -7,4 +7,46 @@ SECRET_KEY = environ.get("SECRET_KEY")
 
 KAFKA_BROKER_URL = environ.get("KAFKA_BROKER_URL")
 KAFKA_TOPIC = environ.get("KAFKA_TOPIC")
+KAFKA_SERIALIZER = environ.get("KAFKA_SERIALIZER", "json")
+KAFKA_COMPRESSION = environ.get("KAFKA_COMPRESSION", "lz4")
 print(KAFKA_BROKER_URL, KAFKA_TOPIC)
+
+# Every API process reads tariff events for SSE in a group of its own
+KAFKA_STREAM_GROUP_PREFIX = environ.get("KAFKA_STREAM_GROUP_PREFIX", "tariff-stream")
+
+KAFKA_AUDIT_GROUP_ID = environ.get("KAFKA_AUDIT_GROUP_ID", "audit-log")
+KAFKA_AUDIT_BATCH_SIZE = int(environ.get("KAFKA_AUDIT_BATCH_SIZE", 500))
+KAFKA_AUDIT_LINGER = float(environ.get("KAFKA_AUDIT_LINGER", 1.0))
+# Port of the audit consumer metrics endpoint, 0 disables it
+KAFKA_AUDIT_METRICS_PORT = int(environ.get("KAFKA_AUDIT_METRICS_PORT", 9100))
+
+JOB_WORKER_MODE = environ.get("JOB_WORKER_MODE", "asyncio")
+JOB_WORKER_CONCURRENCY = int(environ.get("JOB_WORKER_CONCURRENCY", 4))
+JOB_POLL_INTERVAL = float(environ.get("JOB_POLL_INTERVAL", 1.0))
+# A running job whose lease is not renewed for this long is claimed again
+JOB_LEASE_SECONDS = float(environ.get("JOB_LEASE_SECONDS", 60))
+JOB_MAX_ATTEMPTS = int(environ.get("JOB_MAX_ATTEMPTS", 3))
+
+SLOW_QUERY_LOG = environ.get("SLOW_QUERY_LOG", "false").lower() == "true"
+SLOW_QUERY_THRESHOLD_MS = float(environ.get("SLOW_QUERY_THRESHOLD_MS", 200))
+SLOW_QUERY_EXPLAIN_RATE = float(environ.get("SLOW_QUERY_EXPLAIN_RATE", 0.1))
+# Statements per request before they are reported as possible N+1, 0 disables
+QUERY_BUDGET = int(environ.get("QUERY_BUDGET", 0))
+
+TARIFF_CACHE_WINDOW_DAYS = int(environ.get("TARIFF_CACHE_WINDOW_DAYS", 30))
+TARIFF_CACHE_REFRESH_INTERVAL = float(environ.get("TARIFF_CACHE_REFRESH_INTERVAL", 60))
+# Largest number of ids accepted by one bulk tariff delete
+TARIFF_BULK_DELETE_MAX_IDS = int(environ.get("TARIFF_BULK_DELETE_MAX_IDS", 1000))
+
+REPORTS_USE_MATVIEW = environ.get("REPORTS_USE_MATVIEW", "false").lower() == "true"
+
+# Longest date range of the insurance portfolio endpoint
+PORTFOLIO_MAX_DAYS = int(environ.get("PORTFOLIO_MAX_DAYS", 366))
+
+TARIFF_STREAM_HISTORY = int(environ.get("TARIFF_STREAM_HISTORY", 1000))
+TARIFF_STREAM_BUFFER = int(environ.get("TARIFF_STREAM_BUFFER", 100))
+
+PROFILER_INTERVAL_MS = float(environ.get("PROFILER_INTERVAL_MS", 5))
+
+LOOP_LAG_THRESHOLD_MS = float(environ.get("LOOP_LAG_THRESHOLD_MS", 100))
+LOOP_LAG_INTERVAL_MS = float(environ.get("LOOP_LAG_INTERVAL_MS", 50))
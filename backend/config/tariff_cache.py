@@ -0,0 +1,222 @@
+import asyncio
+import json
+import logging
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import func, select
+
+from config.database_conf import SessionLocal
+from config.settings import TARIFF_CACHE_WINDOW_DAYS
+from core.utils.prefix_index import PrefixIndex
+from tables.cargo import Cargo
+from tables.tariffs import Tariff, cargo_tariff_association
+
+
+class TariffCache:
+    """
+    In-memory copy of the cargo catalog and of tariffs around today.
+
+    `cargos` maps a cargo type to (id, declared_value), `rates` maps a date to
+    (rate, sorted array of cargo ids the tariff applies to), `cargo_prefixes`
+    answers cargo type autocomplete. Lookups return None when the cache can't
+    answer, callers then fall back to the database. Writes evict the dates
+    they change before returning, a load running at that moment drops them too.
+    """
+
+    def __init__(self, session_factory=SessionLocal, window_days: int = 30):
+        self.session_factory = session_factory
+        self.window_days = window_days
+
+        self.cargos = {}
+        self.cargo_prefixes = PrefixIndex([])
+        self.rates = {}
+        self.tariff_dates = {}
+        self.evictions = []
+        self.ready = False
+
+        self.pending = False
+        self.task = None
+        self.logger = logging.getLogger(__name__)
+
+    async def load(self):
+        today = date.today()
+        window = timedelta(days=self.window_days)
+
+        cargo_query = select(Cargo.id, Cargo.type, Cargo.declared_value)
+        rate_query = (
+            select(
+                Tariff.id,
+                Tariff.date,
+                Tariff.rate,
+                func.array_agg(cargo_tariff_association.c.cargo_id),
+            )
+            .join(
+                cargo_tariff_association,
+                Tariff.id == cargo_tariff_association.c.tariff_id,
+            )
+            .where(Tariff.date.between(today - window, today + window))
+            .group_by(Tariff.id, Tariff.date, Tariff.rate)
+        )
+
+        # Rows read before a write committed must not bring its dates back
+        self.evictions = []
+
+        async with self.session_factory() as session:
+            cargo_rows = (await session.execute(cargo_query)).all()
+            rate_rows = (await session.execute(rate_query)).all()
+
+        self.cargos = {
+            cargo_type: (cargo_id, declared_value)
+            for cargo_id, cargo_type, declared_value in cargo_rows
+        }
+        self.cargo_prefixes = PrefixIndex(
+            (cargo_type, {"id": cargo_id, "type": cargo_type, "declared_value": value})
+            for cargo_id, cargo_type, value in cargo_rows
+        )
+        self.rates = {
+            tariff_date: (rate, np.sort(np.array(cargo_ids, dtype=np.int64)))
+            for _, tariff_date, rate, cargo_ids in rate_rows
+            if not any(is_evicted(tariff_date) for is_evicted in self.evictions)
+        }
+        self.tariff_dates = {
+            tariff_id: tariff_date for tariff_id, tariff_date, _, _ in rate_rows
+        }
+        self.ready = True
+
+        self.logger.info(
+            f"Tariff cache loaded {len(self.cargos)} cargos, {len(self.rates)} dates"
+        )
+
+    def get_declared_value(self, cargo_type: str):
+        if cargo := self.cargos.get(cargo_type):
+            return cargo[1]
+
+    def search_cargos(self, prefix: str, limit: int):
+        """
+        Method that returns up to `limit` cargos whose type starts with `prefix`.
+        Returns None unless the cache holds a full page of such cargos, as the
+        database would otherwise add fuzzy matches after them.
+        """
+        if not self.ready:
+            return None
+
+        cargos = self.cargo_prefixes.search(prefix, limit)
+
+        if len(cargos) == limit:
+            return cargos
+
+    def evict_cargos(self):
+        """Drops the prefix index until the next load, new cargos may be missing."""
+        self.cargo_prefixes = PrefixIndex([])
+        self.schedule_reload()
+
+    def evict_rates(self, dates=(), tariff_ids=(), date_from=None, date_to=None):
+        """
+        Method that drops the cached rates a write has changed
+
+        :param:
+        - `dates`: Dates of the changed tariffs.
+        - `tariff_ids`: Changed tariffs, their cached dates are dropped.
+        - `date_from`: Start of a changed date range, open when None.
+        - `date_to`: End of a changed date range, open when None.
+        """
+        dates = {*dates}
+        dates.update(
+            self.tariff_dates[tariff_id]
+            for tariff_id in tariff_ids
+            if tariff_id in self.tariff_dates
+        )
+        has_range = date_from is not None or date_to is not None
+
+        def is_evicted(tariff_date):
+            if tariff_date in dates:
+                return True
+
+            return (
+                has_range
+                and (date_from is None or tariff_date >= date_from)
+                and (date_to is None or tariff_date <= date_to)
+            )
+
+        self.evictions.append(is_evicted)
+        self.rates = {
+            tariff_date: tariff
+            for tariff_date, tariff in self.rates.items()
+            if not is_evicted(tariff_date)
+        }
+
+    def invalidate(self, payload: str = None):
+        """
+        Method that applies a `tariffs_changed` notification of any process
+
+        Only the changed date range is dropped, other rates are served until
+        the reload replaces them. Cargo changes and a reconnect (None) only
+        reload.
+
+        :param:
+        - `payload`: JSON with `table` and, for tariff dates, `date_from` and
+          `date_to`.
+        """
+        change = json.loads(payload) if payload else {}
+
+        if "date_from" in change:
+            self.evict_rates(
+                date_from=date.fromisoformat(change["date_from"]),
+                date_to=date.fromisoformat(change["date_to"]),
+            )
+        elif change.get("table") in ("tariffs", "cargo_tariff"):
+            # Truncated, every cached rate is gone
+            self.evict_rates(date_from=date.min)
+
+        self.schedule_reload()
+
+    def get_rate(self, tariff_date, cargo_type: str):
+        if isinstance(tariff_date, str):
+            try:
+                tariff_date = date.fromisoformat(tariff_date)
+            except ValueError:
+                return None
+
+        tariff = self.rates.get(tariff_date)
+        cargo = self.cargos.get(cargo_type)
+
+        if tariff is None or cargo is None:
+            return None
+
+        rate, cargo_ids = tariff
+        index = np.searchsorted(cargo_ids, cargo[0])
+
+        if index < len(cargo_ids) and cargo_ids[index] == cargo[0]:
+            return rate
+
+    async def reload_pending(self):
+        while self.pending:
+            self.pending = False
+
+            try:
+                await self.load()
+            except Exception as e:
+                self.logger.error(f"Failed to load tariff cache: {e}")
+
+    def start_reload(self):
+        self.pending = True
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.reload_pending())
+
+        return self.task
+
+    def schedule_reload(self):
+        # Until warm-up has finished the cache is not used and `run` loads it
+        if self.ready:
+            self.start_reload()
+
+    async def run(self, refresh_interval: float):
+        """Loads the cache and reloads it to pick up writes of other workers."""
+        while True:
+            await self.start_reload()
+            await asyncio.sleep(refresh_interval if self.ready else 1)
+
+
+tariff_cache = TariffCache(window_days=TARIFF_CACHE_WINDOW_DAYS)
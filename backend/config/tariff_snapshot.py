@@ -0,0 +1,129 @@
+import asyncio
+import gzip
+import hashlib
+import logging
+from collections import defaultdict
+from datetime import datetime
+
+import orjson
+from sqlalchemy import select
+
+from config.database_conf import SessionLocal
+from tables.cargo import Cargo
+from tables.tariffs import Tariff, cargo_tariff_association
+
+
+class Snapshot:
+    def __init__(self, version: str, body: bytes):
+        self.version = version
+        self.etag = f'"{version}"'
+        self.body = body
+
+
+class TariffSnapshot:
+    """
+    Gzip-compressed JSON snapshot of all tariffs and the cargos they apply to.
+
+    The snapshot is built on first use and rebuilt in the background after
+    writes of any process, requests are served the latest built snapshot from
+    memory. It is read in one REPEATABLE READ transaction, and the version
+    is a hash of the content, so it is the same on every worker.
+    """
+
+    def __init__(self, session_factory=SessionLocal, compress_level: int = 6):
+        self.session_factory = session_factory
+        self.compress_level = compress_level
+
+        self.snapshot = None
+
+        self.pending = False
+        self.task = None
+        self.logger = logging.getLogger(__name__)
+
+    async def load(self):
+        cargo_query = select(Cargo.id, Cargo.type, Cargo.declared_value).order_by(
+            Cargo.id
+        )
+        tariff_query = select(Tariff.id, Tariff.date, Tariff.rate).order_by(Tariff.date)
+        association_query = select(
+            cargo_tariff_association.c.tariff_id,
+            cargo_tariff_association.c.cargo_id,
+        ).order_by(cargo_tariff_association.c.cargo_id)
+
+        async with self.session_factory() as session:
+            # The three reads must see the same committed state
+            await session.connection(
+                execution_options={"isolation_level": "REPEATABLE READ"}
+            )
+            cargo_rows = (await session.execute(cargo_query)).all()
+            tariff_rows = (await session.execute(tariff_query)).all()
+            association_rows = (await session.execute(association_query)).all()
+
+        tariff_cargos = defaultdict(list)
+        for tariff_id, cargo_id in association_rows:
+            tariff_cargos[tariff_id].append(cargo_id)
+
+        return {
+            "cargos": [
+                {"id": cargo_id, "type": cargo_type, "declared_value": value}
+                for cargo_id, cargo_type, value in cargo_rows
+            ],
+            "tariffs": [
+                {
+                    "id": tariff_id,
+                    "date": tariff_date,
+                    "rate": rate,
+                    "cargo_ids": tariff_cargos[tariff_id],
+                }
+                for tariff_id, tariff_date, rate in tariff_rows
+            ],
+        }
+
+    def build(self, data: dict):
+        content = orjson.dumps(data)
+        version = hashlib.sha256(content).hexdigest()[:16]
+
+        if self.snapshot is not None and self.snapshot.version == version:
+            return self.snapshot
+
+        body = orjson.dumps(
+            {
+                "version": version,
+                "generated_at": datetime.now().isoformat(),
+                **data,
+            }
+        )
+
+        return Snapshot(version, gzip.compress(body, self.compress_level))
+
+    async def rebuild_pending(self):
+        while self.pending:
+            self.pending = False
+
+            try:
+                data = await self.load()
+                self.snapshot = await asyncio.to_thread(self.build, data)
+            except Exception as e:
+                self.logger.error(f"Failed to build tariff snapshot: {e}")
+
+    def schedule_rebuild(self):
+        self.pending = True
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.rebuild_pending())
+
+        return self.task
+
+    def invalidate(self, payload: str = None):
+        """Rebuilds after a write of another process, unless nothing was built yet."""
+        if self.snapshot is not None or self.task is not None:
+            self.schedule_rebuild()
+
+    async def get(self):
+        if self.snapshot is None:
+            await asyncio.shield(self.schedule_rebuild())
+
+        return self.snapshot
+
+
+tariff_snapshot = TariffSnapshot()
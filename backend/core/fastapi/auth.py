@@ -1,4 +1,5 @@
-from datetime import timedelta, datetime
+from datetime import timedelta, datetime, timezone
+from uuid import uuid4
 
 import jwt
 from fastapi import Depends, HTTPException
@@ -9,6 +10,26 @@ from passlib.context import CryptContext
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="auth/login/")
 
 
+class TokenRevocationList:
+    """In-memory list of revoked token ids kept until the tokens expire."""
+
+    def __init__(self):
+        self.revoked = {}
+
+    def purge(self):
+        now = datetime.now(timezone.utc).timestamp()
+        self.revoked = {
+            jti: expire for jti, expire in self.revoked.items() if expire > now
+        }
+
+    def revoke(self, jti: str, expire: float):
+        self.purge()
+        self.revoked[jti] = expire
+
+    def is_revoked(self, jti: str):
+        return jti in self.revoked
+
+
 class AuthEmail:
     def __init__(
         self,
@@ -17,6 +38,7 @@ class AuthEmail:
         algorithm: str = "HS256",
         access_token_expire_hours: int = 24,
         refresh_token_expire_days: int = 7,
+        revocation_list: TokenRevocationList = None,
     ):
         self.secret_key = secret_key
         self.algorithm = algorithm
@@ -26,18 +48,28 @@ class AuthEmail:
 
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
         self.user_model = user_model
+        self.revocation_list = revocation_list
 
     def create_jwt_token(self, data: dict, expires_delta: timedelta):
         to_encode = data.copy()
-        expire = datetime.now() + expires_delta
+        expire = datetime.now(timezone.utc) + expires_delta
 
         to_encode.update({"exp": expire})
 
         return jwt.encode(to_encode, self.secret_key, self.algorithm)
 
+    def decode_token(self, token: str, token_type: str):
+        payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+
+        # Tokens issued before the typ claim was added are access tokens
+        if payload.get("typ", "access") != token_type:
+            raise self.get_credentials_exc("Invalid token type")
+
+        return payload
+
     def get_request_user(self, token: str = Depends(oauth2_scheme)):
         try:
-            payload = jwt.decode(token, self.secret_key, algorithms=[self.algorithm])
+            payload = self.decode_token(token, "access")
             email: str = payload.get("sub")
             role: str = payload.get("role")
 
@@ -62,12 +94,56 @@ class AuthEmail:
 
         return role_checker
 
+    def get_access_token(self, jwt_data):
+        return self.create_jwt_token(
+            {**jwt_data, "typ": "access"}, self.access_token_expire
+        )
+
+    def get_refresh_token(self, jwt_data):
+        return self.create_jwt_token(
+            {**jwt_data, "typ": "refresh", "jti": uuid4().hex},
+            self.refresh_token_expire,
+        )
+
     def get_tokens(self, jwt_data):
-        access_token = self.create_jwt_token(jwt_data, self.access_token_expire)
-        refresh_token = self.create_jwt_token(jwt_data, self.refresh_token_expire)
+        access_token = self.get_access_token(jwt_data)
+        refresh_token = self.get_refresh_token(jwt_data)
 
         return access_token, refresh_token
 
+    def get_refresh_payload(self, refresh_token: str):
+        try:
+            payload = self.decode_token(refresh_token, "refresh")
+        except InvalidTokenError:
+            raise self.get_credentials_exc("Invalid refresh token")
+
+        if self.revocation_list and self.revocation_list.is_revoked(
+            payload.get("jti")
+        ):
+            raise self.get_credentials_exc("Refresh token has been revoked")
+
+        return payload
+
+    def refresh_access_token(self, refresh_token: str):
+        """
+        Method that issues a new access token from the claims of a refresh token
+
+        :param:
+        - `refresh_token`: Refresh token issued on login.
+
+        :return:
+            `New access token.`
+        """
+        payload = self.get_refresh_payload(refresh_token)
+
+        return self.get_access_token({"sub": payload["sub"], "role": payload["role"]})
+
+    def revoke_refresh_token(self, refresh_token: str):
+        payload = self.get_refresh_payload(refresh_token)
+
+        if self.revocation_list:
+            self.revocation_list.revoke(payload["jti"], payload["exp"])
+
     def get_password_hash(self, password: str):
         return self.pwd_context.hash(password)
 
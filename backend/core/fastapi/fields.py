@@ -0,0 +1,23 @@
+from typing import Optional
+
+from fastapi.params import Query
+
+
+def split_fields(value: Optional[str]):
+    if value is None:
+        return None
+
+    return [field.strip() for field in value.split(",") if field.strip()]
+
+
+def get_sparse_fields(
+    fields: Optional[str] = Query(None, description="Поля через запятую"),
+    include: Optional[str] = Query(None, description="Связанные поля через запятую"),
+):
+    """
+    Dependency that reads `?fields=` and `?include=` into keyword arguments of
+    `Crud.list` and `Crud.retrieve`. Without either parameter both stay None and
+    endpoints return the full representation, `?fields=` alone selects columns
+    without relations.
+    """
+    return {"fields": split_fields(fields), "include": split_fields(include)}
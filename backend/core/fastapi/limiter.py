@@ -0,0 +1,128 @@
+import asyncio
+
+from fastapi import HTTPException, Request
+from fastapi.responses import StreamingResponse
+
+from core.utils.metrics import metrics
+
+
+class RouteLimit:
+    def __init__(self, max_concurrent: int):
+        self.semaphore = asyncio.Semaphore(max_concurrent)
+        self.waiting = 0
+
+
+class LimiterSlot:
+    """Acquired semaphore slot that is released once, by whoever finishes last."""
+
+    def __init__(self, semaphore: asyncio.Semaphore):
+        self.semaphore = semaphore
+        self.held = False
+        self.released = False
+
+    def release(self):
+        if not self.released:
+            self.released = True
+            self.semaphore.release()
+
+
+class LimitedStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that keeps the limiter slot of `request` until it is sent.
+
+    The slot is released when sending finishes, fails or is cancelled by a
+    client disconnect. A handler that raises after creating the response has
+    its slot released by the limiter dependency.
+    """
+
+    def __init__(self, request: Request, content, *args, **kwargs):
+        super().__init__(content, *args, **kwargs)
+        self.slot = getattr(request.state, "limiter_slot", None)
+
+        if self.slot is not None:
+            self.slot.held = True
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            if self.slot is not None:
+                self.slot.release()
+
+
+class ConcurrencyLimiter:
+    """
+    Router dependency that limits concurrent requests per route.
+
+    Requests over `max_concurrent` wait in a queue of at most `max_queue`
+    entries for up to `queue_timeout` seconds, after that they are shed with 503.
+    Streaming handlers keep their slot until the body is sent by returning a
+    `LimitedStreamingResponse`.
+    """
+
+    def __init__(
+        self,
+        max_concurrent: int,
+        max_queue: int = 0,
+        queue_timeout: float = 1.0,
+        retry_after: int = 1,
+    ):
+        self.max_concurrent = max_concurrent
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+
+        self.limits = {}
+
+    def get_limit(self, route_path: str):
+        if route_path not in self.limits:
+            self.limits[route_path] = RouteLimit(self.max_concurrent)
+
+        return self.limits[route_path]
+
+    def get_overload_exc(self, route_path: str, reason: str):
+        metrics.inc("limiter_shed_total", route=route_path, reason=reason)
+
+        return HTTPException(
+            503,
+            "Service is overloaded, try again later",
+            {"Retry-After": str(self.retry_after)},
+        )
+
+    async def acquire(self, route_path: str, limit: RouteLimit):
+        if not limit.semaphore.locked():
+            await limit.semaphore.acquire()
+            return
+
+        if limit.waiting >= self.max_queue:
+            raise self.get_overload_exc(route_path, "queue_full")
+
+        limit.waiting += 1
+        metrics.set("limiter_queue_depth", limit.waiting, route=route_path)
+
+        try:
+            await asyncio.wait_for(limit.semaphore.acquire(), self.queue_timeout)
+        except asyncio.TimeoutError:
+            raise self.get_overload_exc(route_path, "queue_timeout")
+        finally:
+            limit.waiting -= 1
+            metrics.set("limiter_queue_depth", limit.waiting, route=route_path)
+
+    async def __call__(self, request: Request):
+        route = request.scope.get("route")
+        route_path = getattr(route, "path", request.url.path)
+
+        limit = self.get_limit(route_path)
+        await self.acquire(route_path, limit)
+
+        slot = LimiterSlot(limit.semaphore)
+        request.state.limiter_slot = slot
+
+        try:
+            yield
+        except BaseException:
+            slot.release()
+            raise
+        finally:
+            if not slot.held:
+                slot.release()
@@ -0,0 +1,244 @@
+import asyncio
+import os
+import sys
+import threading
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+from typing import Any, Callable
+from urllib.parse import parse_qs
+
+from fastapi import HTTPException
+from greenlet import getcurrent
+from sqlalchemy import event
+
+current_profile = ContextVar("current_profile", default=None)
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+def get_frame_name(frame):
+    filename = frame.f_code.co_filename
+
+    if filename.startswith(ROOT_DIR):
+        filename = os.path.relpath(filename, ROOT_DIR)
+    else:
+        filename = os.path.basename(filename)
+
+    return f"{frame.f_code.co_qualname} ({filename}:{frame.f_code.co_firstlineno})"
+
+
+def walk_frames(frame, stop_frame=None):
+    """Returns the frames from `frame` to `stop_frame` or the bottom, leaf first."""
+    frames = []
+
+    while frame is not None:
+        frames.append(frame)
+
+        if frame is stop_frame:
+            break
+
+        frame = frame.f_back
+
+    return frames
+
+
+def walk_awaits(coro):
+    """Returns the frames of a suspended coroutine chain and what it waits on."""
+    frames = []
+
+    while coro is not None:
+        frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+        if frame is None:
+            return frames, type(coro).__name__
+
+        frames.append(frame)
+        coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+
+    return frames, None
+
+
+class RequestProfile:
+    """
+    Wall-clock sampling profile of one request task.
+
+    A background thread samples the stack of the task every `interval` seconds,
+    whether it is running on the loop thread or suspended on an await. SQL
+    statements in flight are added as leaf frames and timed separately.
+    """
+
+    def __init__(self, task: asyncio.Task, interval: float):
+        self.task = task
+        self.loop = task.get_loop()
+        self.thread_id = threading.get_ident()
+        # SQLAlchemy runs ORM code in child greenlets of the loop greenlet
+        self.loop_greenlet = getcurrent()
+        self.interval = interval
+
+        self.started = self.duration = 0.0
+        self.samples = Counter()
+        self.sql = []
+        self.current_sql = None
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self.run, daemon=True)
+
+    def get_running_stack(self, root_frame):
+        frame = sys._current_frames().get(self.thread_id)
+        frames = walk_frames(frame, root_frame)
+
+        if frames and frames[-1] is not root_frame:
+            frames += walk_frames(self.loop_greenlet.gr_frame, root_frame)
+
+        return [get_frame_name(frame) for frame in reversed(frames)]
+
+    def get_stack(self):
+        coro = self.task.get_coro()
+        root_frame = getattr(coro, "cr_frame", None)
+
+        if root_frame is None:
+            return None
+
+        if asyncio.current_task(self.loop) is self.task:
+            stack = self.get_running_stack(root_frame)
+        else:
+            frames, awaited = walk_awaits(coro)
+            stack = [get_frame_name(frame) for frame in frames]
+            stack.append(f"<await {awaited}>" if awaited else "<await>")
+
+        if self.current_sql is not None:
+            stack.append(f"SQL {self.current_sql}")
+
+        return stack
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            if stack := self.get_stack():
+                self.samples[";".join(stack)] += 1
+
+    def start(self):
+        self.started = perf_counter()
+        self.thread.start()
+
+    def stop(self):
+        self.duration = perf_counter() - self.started
+        self.stopped.set()
+        self.thread.join()
+
+    def get_collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.items())
+
+    def get_server_timing(self):
+        sql_duration = sum(duration for _, duration in self.sql)
+
+        return (
+            f'sql;dur={sql_duration * 1000:.1f};desc="{len(self.sql)} statements", '
+            f"total;dur={self.duration * 1000:.1f}"
+        )
+
+
+class ProfilerMiddleware:
+    """
+    Profiles requests sent with `?profile=1` or an `X-Profile: 1` header.
+
+    Only users accepted by `authorize` can profile, other requests are served
+    as usual. The response body is replaced with the profile in collapsed
+    stack format accepted by flamegraph.pl and speedscope, the status of the
+    original response is in `X-Profiled-Status`. Nothing is sampled and no
+    SQL listener is registered while no request is profiled.
+    """
+
+    def __init__(
+        self, app, authorize: Callable[[str], Any], engine, interval: float = 0.005
+    ):
+        self.app = app
+        self.authorize = authorize
+        self.engine = engine
+        self.interval = interval
+
+        self.active = 0
+
+    @staticmethod
+    def is_requested(scope):
+        if b"profile=" in scope["query_string"]:
+            query = parse_qs(scope["query_string"].decode())
+            if query.get("profile", [""])[-1] in ("1", "true"):
+                return True
+
+        return dict(scope["headers"]).get(b"x-profile") in (b"1", b"true")
+
+    def is_authorized(self, scope):
+        authorization = dict(scope["headers"]).get(b"authorization", b"").decode()
+        scheme, _, token = authorization.partition(" ")
+
+        if scheme.lower() != "bearer" or not token:
+            return False
+
+        try:
+            self.authorize(token)
+        except HTTPException:
+            return False
+
+        return True
+
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if profile := current_profile.get():
+            profile.current_sql = " ".join(statement.split())[:200]
+            conn.info["profile_query_start"] = perf_counter()
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if profile := current_profile.get():
+            duration = perf_counter() - conn.info.pop("profile_query_start")
+            profile.sql.append((profile.current_sql, duration))
+            profile.current_sql = None
+
+    def listen(self):
+        self.active += 1
+
+        if self.active == 1:
+            sync_engine = self.engine.sync_engine
+            event.listen(sync_engine, "before_cursor_execute", self.before_execute)
+            event.listen(sync_engine, "after_cursor_execute", self.after_execute)
+
+    def unlisten(self):
+        self.active -= 1
+
+        if self.active == 0:
+            sync_engine = self.engine.sync_engine
+            event.remove(sync_engine, "before_cursor_execute", self.before_execute)
+            event.remove(sync_engine, "after_cursor_execute", self.after_execute)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.is_requested(scope):
+            return await self.app(scope, receive, send)
+
+        if not self.is_authorized(scope):
+            return await self.app(scope, receive, send)
+
+        status = {}
+
+        async def send_status(message):
+            if message["type"] == "http.response.start":
+                status["code"] = message["status"]
+
+        profile = RequestProfile(asyncio.current_task(), self.interval)
+        token = current_profile.set(profile)
+        self.listen()
+        profile.start()
+
+        try:
+            await self.app(scope, receive, send_status)
+        finally:
+            profile.stop()
+            self.unlisten()
+            current_profile.reset(token)
+
+        body = profile.get_collapsed().encode()
+        headers = [
+            (b"content-type", b"text/plain; charset=utf-8"),
+            (b"content-length", str(len(body)).encode()),
+            (b"x-profiled-status", str(status.get("code", 500)).encode()),
+            (b"server-timing", profile.get_server_timing().encode()),
+        ]
+
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -1,9 +1,10 @@
+from functools import cached_property
 from typing import Optional
 
 from fastapi import HTTPException, Response
-from sqlalchemy import asc, desc, select
+from sqlalchemy import and_, asc, bindparam, delete, desc, inspect, or_, select
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import joinedload
+from sqlalchemy.orm import joinedload, load_only, selectinload
 
 from core.sqlalchemy.orm import Orm
 
@@ -12,37 +13,156 @@ class Crud:
     def __init__(self, table):
         self.table = table
 
+        # Per-table plan, built once instead of on every call
+        self.columns = {
+            column.key: getattr(table, column.key) for column in table.__table__.columns
+        }
+        self.unique_fields = self.get_unique_fields(table)
+        self.retrieve_query = select(table).where(table.id == bindparam("obj_id"))
+        self.delete_query = (
+            delete(table.__table__)
+            .where(table.id == bindparam("obj_id"))
+            .returning(table.id)
+        )
+        self.unique_queries = {}
+
+    # Relations are read on first use, the mappers may not be configured yet
+    @cached_property
+    def relations(self):
+        return {
+            name: getattr(self.table, name)
+            for name in self.table.__mapper__.relationships.keys()
+        }
+
+    @cached_property
+    def mtm_fields(self):
+        return Orm.get_mtm_fields(self.table)
+
     def get_not_found_text(self, obj_id: int):
         return f"{self.table.__name__} with ID №{obj_id} not found"
 
+    def get_columns(self, fields: Optional[list] = None):
+        if not fields:
+            return list(self.columns.values())
+
+        if unknown := set(fields) - self.columns.keys():
+            raise HTTPException(
+                400,
+                f"Unknown {self.table.__name__} fields: {', '.join(sorted(unknown))}",
+            )
+
+        return [self.columns[field] for field in fields]
+
+    def get_relations(self, include: Optional[list] = None):
+        if unknown := set(include or []) - self.relations.keys():
+            raise HTTPException(
+                400,
+                f"Unknown {self.table.__name__} relations: {', '.join(sorted(unknown))}",
+            )
+
+        return [self.relations[relation] for relation in include or []]
+
+    def get_sparse_query(self, fields: Optional[list], include: Optional[list]):
+        """
+        Method that builds a select of the requested fields only
+
+        Without relations the query selects plain columns, otherwise instances
+        with the other columns deferred and the relations loaded by selectin.
+
+        :param:
+        - `fields`: Names of the columns, all columns when empty.
+        - `include`: Names of the relations to load.
+
+        :return:
+            `Select and function converting its result to dictionaries.`
+        """
+        columns = self.get_columns(fields)
+        relations = self.get_relations(include)
+
+        if not relations:
+            return select(*columns), lambda result: result.mappings().all()
+
+        names = [column.key for column in columns + relations]
+        query = select(self.table).options(
+            load_only(*columns), *[selectinload(relation) for relation in relations]
+        )
+
+        def to_dicts(result):
+            return [
+                {name: getattr(obj, name) for name in names}
+                for obj in result.scalars().all()
+            ]
+
+        return query, to_dicts
+
     @staticmethod
     def get_unique_fields(table):
         return [column.name for column in table.__table__.columns if column.unique]
 
-    @staticmethod
-    async def check_field_unique(
-        table, data: dict, field: str, session: AsyncSession, obj_id=None
-    ):
+    def get_unique_query(self, fields: tuple, exclude_obj: bool):
+        if (fields, exclude_obj) not in self.unique_queries:
+            query = select(*[self.columns[field] for field in fields]).where(
+                or_(*[self.columns[field] == bindparam(field) for field in fields])
+            )
+
+            if exclude_obj:
+                query = query.where(self.table.id != bindparam("obj_id"))
+
+            self.unique_queries[(fields, exclude_obj)] = query.limit(1)
+
+        return self.unique_queries[(fields, exclude_obj)]
+
+    async def check_unique_fields(self, data: dict, session: AsyncSession, obj_id=None):
+        """
+        Method that checks the unique fields present in `data` with one query
+
+        :param:
+        - `data`: Dictionary with data of the instance.
+        - `session`: The current database session.
+        - `obj_id`: ID of the updated instance, excluded from the check.
+
+        :return:
+            `None, raises HTTPException(400) on the first taken value.`
+        """
+        fields = tuple(field for field in self.unique_fields if field in data)
+
+        if not fields:
+            return
+
+        params = {field: data[field] for field in fields}
+        if obj_id is not None:
+            params["obj_id"] = obj_id
+
         async with session.begin():
-            field_value = data.get(field)
-            filter_data = {field: field_value}
-            exclude_data = {"id": obj_id} if obj_id else None
+            query = self.get_unique_query(fields, obj_id is not None)
+            row = (await session.execute(query, params)).first()
 
-            query = await Orm.filter_by(table, filter_data, session, exclude_data)
+        if row is None:
+            return
 
-            if query.scalar() is not None:
+        for field in fields:
+            if row._mapping[field] == data[field]:
                 raise HTTPException(
-                    400, f"{table.__name__} with {field}={field_value} already exists"
+                    400,
+                    f"{self.table.__name__} with {field}={data[field]} already exists",
                 )
 
-    @classmethod
-    async def check_unique_fields(
-        cls, table, data: dict, session: AsyncSession, obj_id=None
+    async def get_by_id(
+        self,
+        obj_id: int,
+        session: AsyncSession,
+        relations=None,
+        populate_existing: bool = False,
     ):
-        unique_fields = cls.get_unique_fields(table)
+        query = self.retrieve_query
 
-        for field in unique_fields:
-            await cls.check_field_unique(table, data, field, session, obj_id)
+        if relations:
+            query = Orm.get_query_with_relations(query, relations)
+
+        if populate_existing:
+            query = query.execution_options(populate_existing=True)
+
+        return (await session.execute(query, {"obj_id": obj_id})).scalar()
 
     async def create(self, data, session: AsyncSession, relations=None):
         """
@@ -57,14 +177,12 @@ class Crud:
         """
         model_dump = data.model_dump()
 
-        await self.check_unique_fields(self.table, model_dump, session)
+        await self.check_unique_fields(model_dump, session)
 
         instance = await Orm.create(self.table, model_dump, session)
 
         if relations:
-            instance = await Orm.scalar(
-                self.table, session, self.table.id == instance.id, relations
-            )
+            instance = await self.get_by_id(instance.id, session, relations)
 
         if nested_data := Orm.get_related_fields_dict(self.table, model_dump):
             instance = await self.create_nested(instance, session, nested_data)
@@ -72,7 +190,11 @@ class Crud:
         return instance
 
     async def create_nested(self, instance, session: AsyncSession, nested_data: dict):
-        nested_fields = Orm.get_mtm_fields(self.table)
+        nested_fields = self.mtm_fields
+
+        # Relations raise on lazy load, collections are loaded before appending
+        if unloaded := inspect(instance).unloaded & set(nested_fields):
+            await session.refresh(instance, list(unloaded))
 
         for table_and_field, data in nested_data.items():
             for nested_obj in data:
@@ -96,12 +218,58 @@ class Crud:
         return result.scalar()
 
     async def create_bulk(
-        self, data, bulk_key: str, session: AsyncSession, return_data=None
+        self,
+        data,
+        bulk_key: str,
+        session: AsyncSession,
+        return_data=None,
+        conflict_fields: list = None,
     ):
+        """
+        Method that creates many instances of the table
+
+        :param:
+        - `data`: Model with the list of instances under `bulk_key`.
+        - `bulk_key`: Name of the field with the list of instances.
+        - `session`: The current database session.
+        - `return_data`: Fields to return after insert.
+        - `conflict_fields`: Unique fields, rows conflicting on them are reported
+          in `conflicts` instead of aborting the insert.
+
+        :return:
+            `ids of created objects and conflicting rows.`
+        """
         data_list = data.model_dump()[bulk_key]
 
-        result = await Orm.insert(self.table, data_list, session, return_data)
-        return {bulk_key: [{"id": row[0]} for row in result.fetchall()]}
+        if not conflict_fields:
+            rows = await Orm.insert_many(self.table, data_list, session, return_data)
+            return {bulk_key: [{"id": row[0]} for row in rows]}
+
+        conflict_columns = [getattr(self.table, field) for field in conflict_fields]
+        rows = await Orm.insert_many(
+            self.table,
+            data_list,
+            session,
+            [self.table.id, *conflict_columns],
+            conflict_fields,
+        )
+        inserted_ids = {tuple(row[1:]): row[0] for row in rows}
+
+        created, conflicts = [], []
+        for index, item in enumerate(data_list):
+            key = tuple(item[field] for field in conflict_fields)
+
+            if obj_id := inserted_ids.pop(key, None):
+                created.append({"index": index, "id": obj_id})
+            else:
+                conflicts.append(
+                    {
+                        "index": index,
+                        **{field: item[field] for field in conflict_fields},
+                    }
+                )
+
+        return {bulk_key: created, "conflicts": conflicts}
 
     async def delete(
         self,
@@ -113,6 +281,8 @@ class Crud:
         """
         Method that deletes the instance of the table
 
+        Related association rows are removed by ON DELETE CASCADE.
+
         :param:
         - `obj_id`: ID of the instance to delete.
         - `session`: The current database session.
@@ -120,22 +290,69 @@ class Crud:
         :return:
             `Response(204).`
         """
-        book = await Orm.scalar(self.table, session, self.table.id == obj_id)
+        deleted_ids = await Orm.delete_returning(
+            self.table, session, stmt=self.delete_query, params={"obj_id": obj_id}
+        )
 
-        if not book:
+        if not deleted_ids:
             raise HTTPException(404, self.get_not_found_text(obj_id))
 
-        await session.delete(book)
-        await session.commit()
-
         return Response(content=content, status_code=status)
 
+    async def delete_bulk(
+        self,
+        session: AsyncSession,
+        ids: Optional[list] = None,
+        filter_expr=None,
+        chunk_size: int = 1000,
+    ):
+        """
+        Method that deletes instances of the table by ids or by filter in chunks
+
+        Every chunk is a separate DELETE ... RETURNING statement and transaction.
+
+        :param:
+        - `session`: The current database session.
+        - `ids`: IDs of the instances to delete.
+        - `filter_expr`: SQLAlchemy expression selecting the instances to delete,
+          combined with `ids` when both are given.
+        - `chunk_size`: Number of instances deleted per statement.
+
+        :return:
+            `ids of deleted objects.`
+        """
+        deleted_ids = []
+
+        if ids is not None:
+            for start in range(0, len(ids), chunk_size):
+                chunk_filter = self.table.id.in_(ids[start : start + chunk_size])
+                if filter_expr is not None:
+                    chunk_filter = and_(chunk_filter, filter_expr)
+
+                deleted_ids += await Orm.delete_returning(
+                    self.table, session, chunk_filter
+                )
+
+            return deleted_ids
+
+        while True:
+            chunk_query = select(self.table.id).where(filter_expr).limit(chunk_size)
+            chunk_ids = await Orm.delete_returning(
+                self.table, session, self.table.id.in_(chunk_query)
+            )
+            deleted_ids += chunk_ids
+
+            if len(chunk_ids) < chunk_size:
+                return deleted_ids
+
     async def list(
         self,
         session: AsyncSession,
         relations=None,
         sort_field: Optional[str] = None,
         sort_order: Optional[str] = "asc",
+        fields: Optional[list] = None,
+        include: Optional[list] = None,
         **filters,
     ):
         """
@@ -145,12 +362,19 @@ class Crud:
         :param relations: Связанные поля.
         :param sort_field: Поле для сортировки.
         :param sort_order: Порядок сортировки ('asc' или 'desc').
+        :param fields: Имена полей, при передаче `fields` или `include`
+            возвращаются словари только с запрошенными полями.
+        :param include: Имена связанных полей для загрузки.
         :param filters: Произвольные параметры для фильтрации.
 
         :return: Список объектов с примененными фильтрацией и сортировкой.
         """
+        sparse = fields is not None or include is not None
 
-        query = select(self.table)
+        if sparse:
+            query, to_dicts = self.get_sparse_query(fields, include)
+        else:
+            query = select(self.table)
 
         for field, value in filters.items():
             if value is not None:
@@ -168,31 +392,54 @@ class Crud:
                 )
                 query = query.order_by(order)
 
-        if relations:
+        if relations and not sparse:
             query = Orm.get_query_with_relations(query, relations)
 
         execution = await session.execute(query)
-        return execution.scalars().all()
+        return to_dicts(execution) if sparse else execution.scalars().all()
 
-    async def retrieve(self, obj_id: int, session: AsyncSession, relations=None):
+    async def retrieve(
+        self,
+        obj_id: int,
+        session: AsyncSession,
+        relations=None,
+        fields: Optional[list] = None,
+        include: Optional[list] = None,
+    ):
         """
         Method that retrieves an instance of the table by ID
 
         :param:
         - `obj_id`: ID of the instance to retrieve.
         - `session`: The current database session.
+        - `fields`: Names of the columns to return as a dictionary.
+        - `include`: Names of the relations to load into the dictionary.
 
         :return:
             `Object instance.`
         """
-        obj = await Orm.scalar(self.table, session, self.table.id == obj_id, relations)
+        if fields is not None or include is not None:
+            query, to_dicts = self.get_sparse_query(fields, include)
+            execution = await session.execute(query.where(self.table.id == obj_id))
+
+            if not (objs := to_dicts(execution)):
+                raise HTTPException(404, self.get_not_found_text(obj_id))
+
+            return objs[0]
+
+        obj = await self.get_by_id(obj_id, session, relations)
         if not obj:
             raise HTTPException(404, self.get_not_found_text(obj_id))
 
         return obj
 
     async def update(
-        self, data: dict, obj_id: int, session: AsyncSession, relations=None
+        self,
+        data: dict,
+        obj_id: int,
+        session: AsyncSession,
+        relations=None,
+        single_statement: bool = False,
     ):
         """
         Method that updates an instance of the table
@@ -201,18 +448,54 @@ class Crud:
         - `data`: Dictionary with updated data.
         - `obj_id`: ID of the instance to update.
         - `session`: The current database session.
+        - `single_statement`: Update with one UPDATE ... RETURNING statement.
 
         :return:
             `Updated object.`
         """
-        await self.check_unique_fields(self.table, data, session, obj_id)
+        if single_statement:
+            return await self.update_returning(data, obj_id, session, relations)
+
+        await self.check_unique_fields(data, session, obj_id)
 
-        obj = await Orm.scalar(self.table, session, self.table.id == obj_id, relations)
+        obj = await self.get_by_id(obj_id, session, relations)
 
         if not obj:
             raise HTTPException(404, self.get_not_found_text(obj_id))
 
         await Orm.update(obj, data, session)
-        await session.refresh(obj)
 
-        return obj
+        # A plain refresh expires the loaded relations, which raise on access
+        return await self.get_by_id(obj_id, session, relations, populate_existing=True)
+
+    async def update_returning(
+        self, data: dict, obj_id: int, session: AsyncSession, relations=None
+    ):
+        """
+        Method that updates an instance of the table with UPDATE ... RETURNING
+
+        Unique violations are left to the database constraints, relations are
+        loaded with a separate query only when they are requested.
+
+        :param:
+        - `data`: Dictionary with updated data.
+        - `obj_id`: ID of the instance to update.
+        - `session`: The current database session.
+
+        :return:
+            `Updated object.`
+        """
+        if not data:
+            return await self.retrieve(obj_id, session, relations)
+
+        row = await Orm.update_returning(
+            self.table, data, session, self.table.id == obj_id
+        )
+
+        if not row:
+            raise HTTPException(404, self.get_not_found_text(obj_id))
+
+        if relations:
+            return await self.retrieve(obj_id, session, relations)
+
+        return self.table(**row._mapping)
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+
+from sqlalchemy import text
+
+
+class MaterializedView:
+    """
+    Refreshes a materialized view concurrently in the background.
+
+    Refresh requests made while a refresh is running are coalesced into one more run.
+    """
+
+    def __init__(self, name: str, session_factory):
+        self.name = name
+        self.session_factory = session_factory
+
+        self.pending = False
+        self.task = None
+        self.logger = logging.getLogger(__name__)
+
+    async def refresh(self):
+        async with self.session_factory() as session:
+            await session.execute(
+                text(f"REFRESH MATERIALIZED VIEW CONCURRENTLY {self.name}")
+            )
+            await session.commit()
+
+    async def refresh_pending(self):
+        while self.pending:
+            self.pending = False
+
+            try:
+                await self.refresh()
+            except Exception as e:
+                self.logger.error(f"Failed to refresh {self.name}: {e}")
+
+    def schedule_refresh(self):
+        self.pending = True
+
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.refresh_pending())
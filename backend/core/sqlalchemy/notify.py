@@ -0,0 +1,72 @@
+import asyncio
+import logging
+from typing import Callable
+
+import asyncpg
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+
+class PgListener:
+    """
+    Calls `callbacks` with the payload of every NOTIFY sent on `channel`.
+
+    The listener holds one connection outside the engine pool, checks it every
+    `keepalive` seconds and reconnects after `retry_interval` seconds when it
+    is lost. Notifications sent while disconnected are lost, so callbacks are
+    also called with None after every connect and must then assume anything
+    has changed.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        channel: str,
+        callbacks: list[Callable] = None,
+        retry_interval: float = 5.0,
+        keepalive: float = 30.0,
+    ):
+        self.dsn = engine.url.set(drivername="postgresql").render_as_string(
+            hide_password=False
+        )
+        self.channel = channel
+        self.callbacks = callbacks or []
+        self.retry_interval = retry_interval
+        self.keepalive = keepalive
+
+        self.logger = logging.getLogger(__name__)
+
+    def notify(self, payload):
+        for callback in self.callbacks:
+            try:
+                callback(payload)
+            except Exception as e:
+                self.logger.error(f"Failed to handle {self.channel} notify: {e}")
+
+    def on_notification(self, connection, pid, channel, payload):
+        self.notify(payload)
+
+    async def listen(self):
+        connection = await asyncpg.connect(self.dsn)
+        terminated = asyncio.Event()
+
+        try:
+            connection.add_termination_listener(lambda _: terminated.set())
+            await connection.add_listener(self.channel, self.on_notification)
+            self.notify(None)
+
+            while not terminated.is_set():
+                try:
+                    await asyncio.wait_for(terminated.wait(), self.keepalive)
+                except asyncio.TimeoutError:
+                    await connection.fetchval("SELECT 1", timeout=self.keepalive)
+        finally:
+            connection.terminate()
+
+    async def run(self):
+        while True:
+            try:
+                await self.listen()
+            except Exception as e:
+                self.logger.error(f"Lost {self.channel} listener connection: {e}")
+
+            await asyncio.sleep(self.retry_interval)
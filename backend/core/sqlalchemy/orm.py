@@ -1,35 +1,38 @@
+from functools import cache
 from typing import Union, Any, Sequence
 
-from sqlalchemy import select, Result, Row, RowMapping, insert, update
+from sqlalchemy import select, Result, Row, RowMapping, delete, insert, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import selectinload, RelationshipProperty
 
 
 class Orm:
+    # asyncpg can't bind more parameters than this in one statement
+    PARAMS_LIMIT = 32767
 
     @staticmethod
-    def get_mtm_fields(table):
-        mtm_fields = []
-        for field_name, field in table.__mapper__.relationships.items():
-            if isinstance(field, RelationshipProperty) and field.secondary is not None:
-                mtm_fields.append(field_name)
-
-        return mtm_fields
-
-    @staticmethod
-    def get_related_fields_dict(table, data: dict):
-        result = {}
+    @cache
+    def get_mtm_relations(table) -> dict:
+        """Returns many-to-many relation names and related tables, once per table."""
+        return {
+            field_name: relation.mapper.class_
+            for field_name, relation in table.__mapper__.relationships.items()
+            if isinstance(relation, RelationshipProperty)
+            and relation.secondary is not None
+        }
 
-        for field_name, relation in table.__mapper__.relationships.items():
-            if (
-                isinstance(relation, RelationshipProperty)
-                and relation.secondary is not None
-            ):
-                related_model = relation.mapper.class_
-                if field_name in data:
-                    result[(related_model, field_name)] = data[field_name]
+    @classmethod
+    def get_mtm_fields(cls, table):
+        return list(cls.get_mtm_relations(table))
 
-        return result
+    @classmethod
+    def get_related_fields_dict(cls, table, data: dict):
+        return {
+            (related_model, field_name): data[field_name]
+            for field_name, related_model in cls.get_mtm_relations(table).items()
+            if field_name in data
+        }
 
     @staticmethod
     def get_related_field(table, related_table):
@@ -44,15 +47,10 @@ class Orm:
     def get_query_with_relations(query, relations="*", join=False):
         return query.options(selectinload(relations))
 
-    @staticmethod
-    def exclude_mtm_fields(table, data: dict):
-        mtm_fields = {
-            field_name
-            for field_name, relation in table.__mapper__.relationships.items()
-            if isinstance(relation, RelationshipProperty)
-            and relation.secondary is not None
-        }
-        return {key: value for key, value in data.items() if key not in mtm_fields}
+    @classmethod
+    def exclude_mtm_fields(cls, table, data: dict):
+        mtm_relations = cls.get_mtm_relations(table)
+        return {key: value for key, value in data.items() if key not in mtm_relations}
 
     @classmethod
     async def all(
@@ -101,6 +99,31 @@ class Orm:
 
         return instance
 
+    @staticmethod
+    async def delete_returning(
+        table, session: AsyncSession, filter_expr=None, stmt=None, params=None
+    ) -> list:
+        """
+        Method to delete records with a single DELETE ... RETURNING id statement.
+
+        :param:
+        - `table`: SQLAlchemy table.
+        - `session`: SQLAlchemy asynchronous session.
+        - `filter_expr`: SQLAlchemy expression selecting the records to delete.
+        - `stmt`: Prebuilt DELETE ... RETURNING statement used instead of `filter_expr`.
+        - `params`: Bind parameters of `stmt`.
+
+        :return:
+            `ids of deleted objects.`
+        """
+        if stmt is None:
+            stmt = delete(table.__table__).where(filter_expr).returning(table.id)
+
+        result = await session.execute(stmt, params)
+        await session.commit()
+
+        return result.scalars().all()
+
     @classmethod
     async def filter_by(
         cls,
@@ -162,6 +185,53 @@ class Orm:
 
         return result
 
+    @classmethod
+    def get_chunks(cls, table, data: list):
+        chunk_size = max(cls.PARAMS_LIMIT // len(table.__table__.columns), 1)
+
+        for start in range(0, len(data), chunk_size):
+            yield data[start : start + chunk_size]
+
+    @classmethod
+    async def insert_many(
+        cls,
+        table,
+        data: list,
+        session: AsyncSession,
+        return_data: list = None,
+        conflict_fields: list = None,
+    ) -> list[Row]:
+        """
+        Method to insert many rows in parameter-safe chunks with executemany.
+
+        :param:
+        - `table`: SQLAlchemy table.
+        - `data`: List of dictionaries with table data.
+        - `session`: SQLAlchemy asynchronous session.
+        - `return_data`: Fields to return after insert.
+        - `conflict_fields`: Unique fields, rows conflicting on them are skipped.
+
+        :return:
+            `Returned rows of inserted objects.`
+        """
+        if not return_data:
+            return_data = [table.id]
+
+        stmt = pg_insert(table.__table__)
+        if conflict_fields:
+            stmt = stmt.on_conflict_do_nothing(index_elements=conflict_fields)
+
+        stmt = stmt.returning(*return_data)
+
+        rows = []
+        for chunk in cls.get_chunks(table, data):
+            result = await session.execute(stmt, chunk)
+            rows += result.fetchall()
+
+        await session.commit()
+
+        return rows
+
     @classmethod
     async def scalar(
         cls,
@@ -206,12 +276,43 @@ class Orm:
         table, update_fields: dict, session: AsyncSession, filter_expr=None
     ):
         stmt = update(table)
-        if filter_expr:
+        if filter_expr is not None:
             stmt = stmt.where(filter_expr)
 
-        await session.execute(stmt.values(**update_fields))
+        result = await session.execute(stmt.values(**update_fields))
         await session.commit()
 
+        return result.rowcount
+
+    @staticmethod
+    async def update_returning(
+        table, update_fields: dict, session: AsyncSession, filter_expr
+    ) -> Row | None:
+        """
+        Method to update records with a single UPDATE ... RETURNING statement.
+
+        :param:
+        - `table`: SQLAlchemy table.
+        - `update_fields`: Dictionary with updated data.
+        - `session`: SQLAlchemy asynchronous session.
+        - `filter_expr`: SQLAlchemy expression selecting the records to update.
+
+        :return:
+            `First updated row, or None if no record matched.`
+        """
+        stmt = (
+            update(table.__table__)
+            .where(filter_expr)
+            .values(**update_fields)
+            .returning(*table.__table__.columns)
+        )
+
+        result = await session.execute(stmt)
+        row = result.first()
+        await session.commit()
+
+        return row
+
     @classmethod
     async def where(
         cls,
@@ -0,0 +1,159 @@
+from datetime import date
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+
+class YearPartitions:
+    """
+    Maintains yearly range partitions `<table>_y<year>` of a partitioned table.
+
+    `dependents` are (table, date column) pairs of tables referencing the
+    partitioned one; their rows are archived together with the partition,
+    otherwise the foreign keys would prevent detaching it. Rows outside the
+    yearly partitions go to the `<table>_default` partition.
+    """
+
+    def __init__(self, table: str, dependents: list = None, column: str = "date"):
+        self.table = table
+        self.column = column
+        self.dependents = dependents or []
+
+    def get_partition_name(self, year: int):
+        return f"{self.table}_y{year}"
+
+    @property
+    def default_partition(self):
+        return f"{self.table}_default"
+
+    @staticmethod
+    def get_year_range(year: int):
+        return date(year, 1, 1), date(year + 1, 1, 1)
+
+    async def get_years(self, session: AsyncSession):
+        query = text(
+            "SELECT child.relname FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "JOIN pg_class parent ON parent.oid = pg_inherits.inhparent "
+            "WHERE parent.relname = :table"
+        )
+        result = await session.execute(query, {"table": self.table})
+        prefix = f"{self.table}_y"
+
+        return sorted(
+            int(name[len(prefix) :])
+            for name in result.scalars()
+            if name.startswith(prefix) and name[len(prefix) :].isdigit()
+        )
+
+    async def count_default_rows(self, session: AsyncSession, year: int):
+        start, end = self.get_year_range(year)
+        exists_query = text("SELECT to_regclass(:partition) IS NOT NULL")
+        params = {"partition": self.default_partition}
+
+        if not (await session.execute(exists_query, params)).scalar():
+            return 0
+
+        count_query = text(
+            f"SELECT count(*) FROM {self.default_partition} "
+            f"WHERE {self.column} >= :start AND {self.column} < :end"
+        )
+        return (
+            await session.execute(count_query, {"start": start, "end": end})
+        ).scalar()
+
+    async def create(self, session: AsyncSession, year: int):
+        start, end = self.get_year_range(year)
+
+        if year in await self.get_years(session):
+            return
+
+        # Postgres refuses to attach a range the default partition has rows in
+        if rows := await self.count_default_rows(session, year):
+            raise ValueError(
+                f"{self.default_partition} has {rows} rows in {year}, move them "
+                f"out before creating {self.get_partition_name(year)}"
+            )
+
+        await session.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {self.get_partition_name(year)} "
+                f"PARTITION OF {self.table} "
+                f"FOR VALUES FROM ('{start}') TO ('{end}')"
+            )
+        )
+
+    async def create_ahead(self, session: AsyncSession, years_ahead: int):
+        """
+        Method that creates partitions from the current year to `years_ahead` years later
+
+        :return:
+            `Years of the partitions.`
+        """
+        current_year = date.today().year
+        years = list(range(current_year, current_year + years_ahead + 1))
+
+        for year in years:
+            await self.create(session, year)
+
+        await session.commit()
+        return years
+
+    async def archive(
+        self, session: AsyncSession, year: int, schema: str = "archive", drop=False
+    ):
+        start, end = self.get_year_range(year)
+        partition = self.get_partition_name(year)
+        range_params = {"start": start, "end": end}
+
+        if not drop:
+            await session.execute(text(f"CREATE SCHEMA IF NOT EXISTS {schema}"))
+
+        for dependent, column in self.dependents:
+            range_filter = f"WHERE {column} >= :start AND {column} < :end"
+
+            if not drop:
+                await session.execute(
+                    text(
+                        f"CREATE TABLE {schema}.{dependent}_y{year} AS "
+                        f"SELECT * FROM {dependent} {range_filter}"
+                    ),
+                    range_params,
+                )
+
+            await session.execute(
+                text(f"DELETE FROM {dependent} {range_filter}"), range_params
+            )
+
+        await session.execute(
+            text(f"ALTER TABLE {self.table} DETACH PARTITION {partition}")
+        )
+
+        if drop:
+            await session.execute(text(f"DROP TABLE {partition}"))
+        else:
+            await session.execute(text(f"ALTER TABLE {partition} SET SCHEMA {schema}"))
+
+    async def archive_before(
+        self, session: AsyncSession, year: int, schema: str = "archive", drop=False
+    ):
+        """
+        Method that detaches partitions of the years before `year`
+
+        Detached partitions and their dependent rows are moved to `schema`,
+        or dropped with `drop`.
+
+        :return:
+            `Years of the archived partitions.`
+        """
+        years = [
+            partition_year
+            for partition_year in await self.get_years(session)
+            if partition_year < year
+        ]
+
+        for partition_year in years:
+            await self.archive(session, partition_year, schema, drop)
+
+        await session.commit()
+        return years
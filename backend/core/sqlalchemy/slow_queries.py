@@ -0,0 +1,157 @@
+import asyncio
+import logging
+import random
+import sys
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+
+from greenlet import getcurrent
+from sqlalchemy import event
+
+from core.utils.metrics import metrics
+
+CRUD_FILES = ("core/sqlalchemy/crud.py", "core/sqlalchemy/orm.py")
+
+current_request = ContextVar("current_request", default=None)
+
+
+def get_crud_callers():
+    """
+    Returns the Crud/Orm methods that issued the current statement, outermost first.
+
+    Statements are executed in a greenlet spawned by SQLAlchemy, the awaiting
+    coroutines are found in the frames of its parent greenlet.
+    """
+    callers = []
+    frame = sys._getframe()
+    parent = getcurrent().parent
+
+    while frame is not None:
+        if frame.f_code.co_filename.endswith(CRUD_FILES):
+            callers.append(frame.f_code.co_qualname)
+
+        frame = frame.f_back
+        if frame is None and parent is not None:
+            frame, parent = parent.gr_frame, None
+
+    return list(reversed(callers))
+
+
+class SlowQueryLog:
+    """
+    Times every statement of the engine and logs those slower than `threshold`.
+
+    A `explain_rate` share of slow SELECT statements is explained with
+    EXPLAIN (ANALYZE, BUFFERS) in the background. With `query_budget` set,
+    requests running more statements are reported as possible N+1 queries,
+    with the most repeated statement.
+    """
+
+    def __init__(
+        self,
+        engine,
+        threshold: float,
+        explain_rate: float = 0.0,
+        query_budget: int = 0,
+    ):
+        self.engine = engine
+        self.threshold = threshold
+        self.explain_rate = explain_rate
+        self.query_budget = query_budget
+
+        self.logger = logging.getLogger(__name__)
+        self.tasks = set()
+
+        event.listen(engine.sync_engine, "before_cursor_execute", self.before_execute)
+        event.listen(engine.sync_engine, "after_cursor_execute", self.after_execute)
+
+    @staticmethod
+    def get_route(request_data: dict):
+        if request_data is None:
+            return None
+
+        scope = request_data["scope"]
+        return getattr(scope.get("route"), "path", scope["path"])
+
+    # Kept on the execution context, after_cursor_execute is not called on errors
+    def before_execute(self, conn, cursor, statement, parameters, context, executemany):
+        context.query_start = perf_counter()
+
+    def after_execute(self, conn, cursor, statement, parameters, context, executemany):
+        duration = perf_counter() - context.query_start
+
+        if statement.startswith("EXPLAIN"):
+            return
+
+        request_data = current_request.get()
+        if request_data is not None:
+            request_data["statements"][statement] += 1
+
+        if duration < self.threshold:
+            return
+
+        route = self.get_route(request_data)
+        metrics.inc("slow_queries_total", route=route)
+        self.logger.warning(
+            f"Slow query {duration * 1000:.1f} ms, route {route}, "
+            f"callers {' > '.join(get_crud_callers())}: {statement} {parameters}"
+        )
+
+        if (
+            statement.lstrip().upper().startswith("SELECT")
+            and not executemany
+            and random.random() < self.explain_rate
+        ):
+            task = asyncio.get_running_loop().create_task(
+                self.explain(statement, parameters)
+            )
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+
+    async def explain(self, statement: str, parameters):
+        try:
+            async with self.engine.connect() as conn:
+                result = await conn.exec_driver_sql(
+                    f"EXPLAIN (ANALYZE, BUFFERS) {statement}", parameters
+                )
+                plan = "\n".join(row[0] for row in result)
+                await conn.rollback()
+
+            self.logger.warning(f"Plan of slow query {statement}:\n{plan}")
+        except Exception as e:
+            self.logger.error(f"Failed to explain slow query: {e}")
+
+    def check_budget(self, request_data: dict):
+        statements = request_data["statements"]
+        total = sum(statements.values())
+        statement, repeats = statements.most_common(1)[0] if statements else (None, 0)
+
+        if total > self.query_budget:
+            route = self.get_route(request_data)
+            metrics.inc("query_budget_exceeded_total", route=route)
+            self.logger.warning(
+                f"Route {route} ran {total} queries, budget {self.query_budget}; "
+                f"possible N+1, repeated {repeats} times: {statement}"
+            )
+
+
+class SlowQueryMiddleware:
+    def __init__(self, app, query_log: SlowQueryLog):
+        self.app = app
+        self.query_log = query_log
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_data = {"scope": scope, "statements": Counter()}
+        token = current_request.set(request_data)
+
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            current_request.reset(token)
+
+            if self.query_log.query_budget:
+                self.query_log.check_budget(request_data)
@@ -0,0 +1,121 @@
+import asyncio
+import json
+import uuid
+from collections import deque
+from typing import Optional
+
+from core.utils.metrics import metrics
+
+
+class Subscriber:
+    def __init__(self, buffer_size: int):
+        self.queue = asyncio.Queue(buffer_size)
+        self.overflowed = False
+
+
+class EventStream:
+    """
+    In-process broadcaster of server-sent events.
+
+    Every subscriber has a bounded buffer, a subscriber that falls behind is
+    disconnected instead of holding memory and resumes with `Last-Event-ID`
+    from the last `history_size` events. Event ids are prefixed with a random
+    process epoch, ids from another process or from before a restart can't be
+    resumed and the client gets a `reset` event to reload its state.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        history_size: int = 1000,
+        buffer_size: int = 100,
+        keepalive: float = 15.0,
+    ):
+        self.name = name
+        self.buffer_size = buffer_size
+        self.keepalive = keepalive
+
+        self.epoch = uuid.uuid4().hex[:8]
+        self.sequence = 0
+        self.history = deque(maxlen=history_size)
+        self.subscribers = set()
+
+    @staticmethod
+    def format(event_id: Optional[str], event: str, data: dict):
+        payload = json.dumps(data, ensure_ascii=False, default=str)
+        lines = [f"id: {event_id}"] if event_id else []
+
+        return "\n".join([*lines, f"event: {event}", f"data: {payload}", "", ""])
+
+    def publish(self, event: str, data: dict):
+        self.sequence += 1
+        message = self.format(f"{self.epoch}-{self.sequence}", event, data)
+
+        self.history.append((self.sequence, message))
+        metrics.inc("event_stream_published_total", stream=self.name)
+
+        for subscriber in self.subscribers:
+            if subscriber.overflowed:
+                continue
+
+            try:
+                subscriber.queue.put_nowait(message)
+            except asyncio.QueueFull:
+                subscriber.overflowed = True
+                metrics.inc("event_stream_overflow_total", stream=self.name)
+
+    def get_missed(self, last_event_id: Optional[str]):
+        """
+        Method that returns the events published after `last_event_id`
+
+        :param:
+        - `last_event_id`: Value of the `Last-Event-ID` header.
+
+        :return:
+            `List of formatted events, None when the client must reset.`
+        """
+        if not last_event_id:
+            return []
+
+        epoch, _, sequence = last_event_id.partition("-")
+        if epoch != self.epoch or not sequence.isdigit():
+            return None
+
+        sequence = int(sequence)
+        oldest = self.history[0][0] if self.history else self.sequence + 1
+
+        if sequence < oldest - 1:
+            return None
+
+        return [message for number, message in self.history if number > sequence]
+
+    async def subscribe(self, last_event_id: Optional[str] = None):
+        subscriber = Subscriber(self.buffer_size)
+        self.subscribers.add(subscriber)
+        metrics.set("event_stream_subscribers", len(self.subscribers), stream=self.name)
+
+        try:
+            missed = self.get_missed(last_event_id)
+
+            if missed is None:
+                yield self.format(None, "reset", {"reason": "history unavailable"})
+                missed = []
+
+            for message in missed:
+                yield message
+
+            while not (subscriber.overflowed and subscriber.queue.empty()):
+                try:
+                    message = await asyncio.wait_for(
+                        subscriber.queue.get(), self.keepalive
+                    )
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+
+                yield message
+        finally:
+            self.subscribers.discard(subscriber)
+            metrics.set(
+                "event_stream_subscribers", len(self.subscribers), stream=self.name
+            )
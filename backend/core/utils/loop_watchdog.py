@@ -0,0 +1,70 @@
+import asyncio
+import logging
+import sys
+import threading
+import traceback
+from time import monotonic
+
+from core.utils.metrics import metrics
+
+
+class LoopWatchdog:
+    """
+    Measures event loop lag and logs the stack of the call blocking the loop.
+
+    A coroutine wakes up every `interval` seconds and records how late it woke
+    up. A thread checks the time of its last wake up, when the loop has not
+    run it for longer than `threshold` seconds the loop thread stack is
+    logged, once per stall.
+    """
+
+    def __init__(self, threshold: float, interval: float = 0.05):
+        self.threshold = threshold
+        self.interval = interval
+
+        self.heartbeat = monotonic()
+        self.loop_thread_id = None
+        self.stopped = threading.Event()
+        self.logger = logging.getLogger(__name__)
+
+    def get_loop_stack(self):
+        frame = sys._current_frames().get(self.loop_thread_id)
+        return "".join(traceback.format_stack(frame)) if frame else ""
+
+    def watch(self):
+        reported = None
+
+        while not self.stopped.wait(self.interval):
+            heartbeat = self.heartbeat
+            stall = monotonic() - heartbeat - self.interval
+
+            if stall < self.threshold or reported == heartbeat:
+                continue
+
+            reported = heartbeat
+            metrics.inc("event_loop_stalls_total")
+            self.logger.warning(
+                f"Event loop blocked for {stall * 1000:.0f} ms, "
+                f"loop thread stack:\n{self.get_loop_stack()}"
+            )
+
+    async def run(self):
+        self.loop_thread_id = threading.get_ident()
+        self.heartbeat = monotonic()
+        self.stopped.clear()
+
+        thread = threading.Thread(target=self.watch, daemon=True)
+        thread.start()
+
+        try:
+            while True:
+                await asyncio.sleep(self.interval)
+
+                now = monotonic()
+                lag = max(now - self.heartbeat - self.interval, 0.0)
+                self.heartbeat = now
+
+                metrics.observe("event_loop_lag_seconds", lag)
+                metrics.set("event_loop_lag_seconds_last", lag)
+        finally:
+            self.stopped.set()
@@ -0,0 +1,76 @@
+import asyncio
+import json
+from collections import defaultdict
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.counters = defaultdict(float)
+        self.gauges = {}
+        self.summaries = defaultdict(lambda: {"count": 0, "sum": 0.0, "max": 0.0})
+
+    @staticmethod
+    def get_key(name: str, labels: dict):
+        if not labels:
+            return name
+
+        labels_str = ",".join(f'{key}="{value}"' for key, value in labels.items())
+        return f"{name}{{{labels_str}}}"
+
+    def inc(self, name: str, value: float = 1, **labels):
+        self.counters[self.get_key(name, labels)] += value
+
+    def set(self, name: str, value: float, **labels):
+        self.gauges[self.get_key(name, labels)] = value
+
+    def observe(self, name: str, value: float, **labels):
+        summary = self.summaries[self.get_key(name, labels)]
+
+        summary["count"] += 1
+        summary["sum"] += value
+        summary["max"] = max(summary["max"], value)
+
+    def snapshot(self):
+        return {
+            "counters": dict(self.counters),
+            "gauges": dict(self.gauges),
+            "summaries": {key: dict(value) for key, value in self.summaries.items()},
+        }
+
+
+metrics = MetricsRegistry()
+
+
+async def handle_metrics_request(reader, writer):
+    try:
+        await reader.readuntil(b"\r\n\r\n")
+
+        body = json.dumps(metrics.snapshot()).encode()
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: application/json\r\n"
+            b"Connection: close\r\n"
+            b"Content-Length: " + str(len(body)).encode() + b"\r\n\r\n" + body
+        )
+        await writer.drain()
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        pass
+    finally:
+        writer.close()
+
+
+async def serve_metrics(port: int, host: str = "0.0.0.0"):
+    """
+    Method that serves the metrics snapshot over HTTP
+
+    For processes without the API, every request gets the same JSON as
+    GET /metrics/ whatever its path.
+
+    :param:
+    - `port`: Port to listen on.
+    - `host`: Interface to listen on.
+
+    :return:
+        `Started asyncio server.`
+    """
+    return await asyncio.start_server(handle_metrics_request, host, port)
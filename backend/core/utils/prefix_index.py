@@ -0,0 +1,25 @@
+from bisect import bisect_left
+
+
+class PrefixIndex:
+    """Case-insensitive prefix lookup over a sorted list of string keys."""
+
+    def __init__(self, items):
+        # Keys differing only in case are ordered by the original key
+        items = sorted(items, key=lambda item: (item[0].lower(), item[0]))
+
+        self.keys = [key.lower() for key, _ in items]
+        self.values = [value for _, value in items]
+
+    def search(self, prefix: str, limit: int):
+        prefix = prefix.lower()
+        start = bisect_left(self.keys, prefix)
+
+        result = []
+        for key, value in zip(self.keys[start : start + limit], self.values[start:]):
+            if not key.startswith(prefix):
+                break
+
+            result.append(value)
+
+        return result
@@ -0,0 +1,44 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls with the same key into one in-flight call.
+
+    All callers waiting on a key receive the result or the error of that call.
+    """
+
+    def __init__(self):
+        self.calls = {}
+
+    async def do(self, key: Hashable, func: Callable[[], Awaitable[Any]]):
+        if future := self.calls.get(key):
+            return await self.wait(key, func, future)
+
+        future = asyncio.get_running_loop().create_future()
+        self.calls[key] = future
+
+        try:
+            result = await func()
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            del self.calls[key]
+
+    async def wait(self, key: Hashable, func, future: asyncio.Future):
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            if future.cancelled() and not asyncio.current_task().cancelling():
+                return await self.do(key, func)
+
+            raise
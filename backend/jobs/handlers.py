@@ -0,0 +1,86 @@
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.settings import REPORTS_USE_MATVIEW
+from core.sqlalchemy.crud import Crud
+from models.cargo import CargoBulkModel
+from models.reports import ReportModel
+from models.tariffs import TariffAdjustModel, TariffBulkDeleteModel
+from services.tariffs import adjust_tariff_rates, delete_tariffs_bulk
+from tables.cargo import Cargo
+from tables.reports import insured_value_daily_view
+from views.reports import get_cargo_rates_query, get_insured_value_query
+
+CARGO_IMPORT_PART_SIZE = 5000
+
+cargo_crud = Crud(Cargo)
+
+
+async def refresh_reports():
+    if REPORTS_USE_MATVIEW:
+        await insured_value_daily_view.refresh()
+
+
+async def adjust_tariffs(
+    params: TariffAdjustModel, session: AsyncSession, job, report_progress
+):
+    updated_count = await adjust_tariff_rates(params, session, job.user_id)
+    await refresh_reports()
+
+    return {"updated": updated_count}
+
+
+async def delete_tariffs(
+    params: TariffBulkDeleteModel, session: AsyncSession, job, report_progress
+):
+    deleted_count = await delete_tariffs_bulk(params, session, job.user_id)
+    await refresh_reports()
+
+    return {"deleted": deleted_count}
+
+
+async def import_cargos(
+    params: CargoBulkModel, session: AsyncSession, job, report_progress
+):
+    result = {"cargos": [], "conflicts": []}
+
+    for start in range(0, len(params.cargos), CARGO_IMPORT_PART_SIZE):
+        part = CargoBulkModel(
+            cargos=params.cargos[start : start + CARGO_IMPORT_PART_SIZE]
+        )
+        part_result = await cargo_crud.create_bulk(
+            part, "cargos", session, conflict_fields=["type"]
+        )
+
+        for key, rows in part_result.items():
+            result[key] += [{**row, "index": row["index"] + start} for row in rows]
+
+        await report_progress((start + len(part.cargos)) / len(params.cargos))
+
+    return result
+
+
+async def insured_value_report(
+    params: ReportModel, session: AsyncSession, job, report_progress
+):
+    query = get_insured_value_query(params.bucket, params.date_from, params.date_to)
+    rows = (await session.execute(query)).mappings().all()
+    return [dict(row) for row in rows]
+
+
+async def cargo_rates_report(
+    params: ReportModel, session: AsyncSession, job, report_progress
+):
+    query = get_cargo_rates_query(
+        params.bucket, params.date_from, params.date_to, params.cargo_type
+    )
+    rows = (await session.execute(query)).mappings().all()
+    return [dict(row) for row in rows]
+
+
+JOB_HANDLERS = {
+    "adjust_tariffs": (TariffAdjustModel, adjust_tariffs),
+    "delete_tariffs": (TariffBulkDeleteModel, delete_tariffs),
+    "import_cargos": (CargoBulkModel, import_cargos),
+    "insured_value_report": (ReportModel, insured_value_report),
+    "cargo_rates_report": (ReportModel, cargo_rates_report),
+}
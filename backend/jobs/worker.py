@@ -0,0 +1,198 @@
+import asyncio
+import logging
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from functools import partial
+from multiprocessing import get_context
+
+from fastapi.encoders import jsonable_encoder
+from sqlalchemy import and_, func, or_, select
+
+from config.database_conf import SessionLocal
+from config.settings import (
+    JOB_LEASE_SECONDS,
+    JOB_MAX_ATTEMPTS,
+    JOB_POLL_INTERVAL,
+    JOB_WORKER_CONCURRENCY,
+    JOB_WORKER_MODE,
+)
+from core.sqlalchemy.orm import Orm
+from jobs.handlers import JOB_HANDLERS
+from tables.jobs import Job
+
+
+class JobWorker:
+    """
+    Runs queued jobs from the jobs table.
+
+    Each of the `concurrency` loops claims the oldest queued job with
+    SELECT ... FOR UPDATE SKIP LOCKED, so several workers never take the same job.
+    A claimed job is leased for `lease` seconds and the lease is renewed while
+    it runs. Jobs of a worker that died are claimed again once their lease
+    expires, until they have been started `max_attempts` times. The attempt
+    number fences the updates, a worker that lost its lease can't overwrite
+    the job of the worker that claimed it next. Handlers of re-claimed jobs
+    run again, so a job runs at least once.
+    """
+
+    def __init__(
+        self,
+        session_factory=SessionLocal,
+        concurrency: int = JOB_WORKER_CONCURRENCY,
+        poll_interval: float = JOB_POLL_INTERVAL,
+        lease: float = JOB_LEASE_SECONDS,
+        max_attempts: int = JOB_MAX_ATTEMPTS,
+    ):
+        self.session_factory = session_factory
+        self.concurrency = concurrency
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+
+        self.running = False
+        self.logger = logging.getLogger(__name__)
+
+    def get_lease_end(self):
+        return func.now() + timedelta(seconds=self.lease)
+
+    @staticmethod
+    def get_lease_expired():
+        return and_(Job.status == "running", Job.locked_until < func.now())
+
+    async def claim(self):
+        next_job = (
+            select(Job.id)
+            .where(
+                or_(Job.status == "queued", self.get_lease_expired()),
+                Job.attempts < self.max_attempts,
+            )
+            .order_by(Job.id)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+            .scalar_subquery()
+        )
+        update_fields = {
+            "status": "running",
+            "started_at": func.now(),
+            "attempts": Job.attempts + 1,
+            "locked_until": self.get_lease_end(),
+        }
+
+        async with self.session_factory() as session:
+            return await Orm.update_returning(
+                Job, update_fields, session, Job.id == next_job
+            )
+
+    async def fail_exhausted(self):
+        """
+        Method that fails the expired jobs that have no attempts left
+
+        :return:
+            `Number of failed jobs.`
+        """
+        update_fields = {
+            "status": "failed",
+            "error": f"Worker lease expired after {self.max_attempts} attempts",
+            "finished_at": func.now(),
+        }
+        exhausted = and_(self.get_lease_expired(), Job.attempts >= self.max_attempts)
+
+        async with self.session_factory() as session:
+            return await Orm.update_field(Job, update_fields, session, exhausted)
+
+    async def update_job(self, job, update_fields: dict):
+        claimed = and_(Job.id == job.id, Job.attempts == job.attempts)
+
+        async with self.session_factory() as session:
+            return await Orm.update_field(Job, update_fields, session, claimed)
+
+    async def report_progress(self, job, progress: float):
+        await self.update_job(job, {"progress": progress})
+
+    async def renew_lease(self, job):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+
+            try:
+                renewed = await self.update_job(
+                    job, {"locked_until": self.get_lease_end()}
+                )
+            except Exception as e:
+                self.logger.error(f"Failed to renew job {job.id} lease: {e}")
+                continue
+
+            if not renewed:
+                self.logger.warning(f"Job {job.id} lease was lost to another worker")
+                return
+
+    async def run_job(self, job):
+        params_model, handler = JOB_HANDLERS[job.type]
+        report_progress = partial(self.report_progress, job)
+        heartbeat = asyncio.create_task(self.renew_lease(job))
+
+        try:
+            async with self.session_factory() as session:
+                params = params_model.model_validate(job.params)
+                result = await handler(params, session, job, report_progress)
+        except Exception as e:
+            self.logger.exception(f"Job {job.id} ({job.type}) failed")
+            update_fields = {"status": "failed", "error": str(e)}
+        else:
+            update_fields = {
+                "status": "done",
+                "progress": 1,
+                "result": jsonable_encoder(result),
+            }
+        finally:
+            heartbeat.cancel()
+
+        update_fields = {
+            **update_fields,
+            "finished_at": func.now(),
+            "locked_until": None,
+        }
+        await self.update_job(job, update_fields)
+
+    async def run_loop(self):
+        while self.running:
+            job = await self.claim()
+
+            if job is None:
+                await self.fail_exhausted()
+                await asyncio.sleep(self.poll_interval)
+            else:
+                await self.run_job(job)
+
+    async def run(self):
+        self.running = True
+        await asyncio.gather(*(self.run_loop() for _ in range(self.concurrency)))
+
+    def stop(self):
+        self.running = False
+
+
+def run_worker_process():
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(JobWorker(concurrency=1).run())
+
+
+def main():
+    logging.basicConfig(level=logging.INFO)
+
+    if JOB_WORKER_MODE != "process":
+        asyncio.run(JobWorker().run())
+        return
+
+    with ProcessPoolExecutor(
+        JOB_WORKER_CONCURRENCY, mp_context=get_context("spawn")
+    ) as executor:
+        futures = [
+            executor.submit(run_worker_process) for _ in range(JOB_WORKER_CONCURRENCY)
+        ]
+
+        for future in futures:
+            future.result()
+
+
+if __name__ == "__main__":
+    main()
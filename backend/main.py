@@ -1,13 +1,76 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
 from sqlalchemy.exc import IntegrityError
 
+from auth.conf import auth
 from auth.views import auth_router
+from config.database_conf import engine
+from config.settings import (
+    KAFKA_BROKER_URL,
+    LOOP_LAG_INTERVAL_MS,
+    LOOP_LAG_THRESHOLD_MS,
+    PROFILER_INTERVAL_MS,
+    QUERY_BUDGET,
+    SLOW_QUERY_EXPLAIN_RATE,
+    SLOW_QUERY_LOG,
+    SLOW_QUERY_THRESHOLD_MS,
+    TARIFF_CACHE_REFRESH_INTERVAL,
+)
+from config.tariff_cache import tariff_cache
+from config.tariff_snapshot import tariff_snapshot
+from core.fastapi.limiter import ConcurrencyLimiter
+from core.fastapi.profiler import ProfilerMiddleware
+from core.sqlalchemy.notify import PgListener
+from core.sqlalchemy.slow_queries import SlowQueryLog, SlowQueryMiddleware
+from core.utils.loop_watchdog import LoopWatchdog
 from exc_handlers.base import value_error_handler, related_errors_handler
+from services.tariffs import tariff_event_listeners
 from views.cargo import cargo_router
+from views.health import health_router
 from views.insurance import insurance_router
-from views.tariffs import tariffs_router
+from views.jobs import jobs_router
+from views.metrics import metrics_router
+from views.reports import reports_router
+from views.tariffs import stream_tariff_event, tariff_event_relay, tariffs_router
+
+
+loop_watchdog = LoopWatchdog(LOOP_LAG_THRESHOLD_MS / 1000, LOOP_LAG_INTERVAL_MS / 1000)
+# Sent by triggers on tariffs, cargo_tariff and cargos, see TariffCache.invalidate
+tariffs_listener = PgListener(
+    engine,
+    "tariffs_changed",
+    [tariff_cache.invalidate, tariff_snapshot.invalidate],
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # /health/ reports ready once the first load has finished
+    warmup_task = asyncio.create_task(tariff_cache.run(TARIFF_CACHE_REFRESH_INTERVAL))
+    watchdog_task = asyncio.create_task(loop_watchdog.run())
+    listener_task = asyncio.create_task(tariffs_listener.run())
+    relay_task = None
+
+    if KAFKA_BROKER_URL:
+        relay_task = asyncio.create_task(tariff_event_relay.run())
+    else:
+        # Without Kafka only events of this process reach its subscribers
+        tariff_event_listeners.append(stream_tariff_event)
+
+    yield
+    warmup_task.cancel()
+    watchdog_task.cancel()
+    listener_task.cancel()
 
-app = FastAPI(title="Test smit app")
+    if relay_task is not None:
+        relay_task.cancel()
+    else:
+        tariff_event_listeners.remove(stream_tariff_event)
+
+
+app = FastAPI(title="Test smit app", lifespan=lifespan)
 
 exc_handlers = {
     ValueError: value_error_handler,
@@ -16,12 +79,39 @@ exc_handlers = {
 routers = {
     "/auth": auth_router,
     "/cargo": cargo_router,
+    "/health": health_router,
     "/insurance": insurance_router,
+    "/jobs": jobs_router,
+    "/metrics": metrics_router,
+    "/reports": reports_router,
     "/tariffs": tariffs_router,
 }
+router_limiters = {
+    "/auth": ConcurrencyLimiter(max_concurrent=10, max_queue=20, queue_timeout=2),
+    "/insurance": ConcurrencyLimiter(max_concurrent=20, max_queue=50, queue_timeout=1),
+    "/reports": ConcurrencyLimiter(max_concurrent=4, max_queue=10, queue_timeout=5),
+    "/tariffs": ConcurrencyLimiter(max_concurrent=20, max_queue=50, queue_timeout=1),
+}
 
 for exception, handler in exc_handlers.items():
     app.add_exception_handler(exception, handler)
 
 for prefix, router in routers.items():
-    app.include_router(router, prefix=prefix)
+    limiter = router_limiters.get(prefix)
+    dependencies = [Depends(limiter)] if limiter else None
+
+    app.include_router(router, prefix=prefix, dependencies=dependencies)
+
+admin_checker = auth.get_request_user_with_roles(["admin"])
+app.add_middleware(
+    ProfilerMiddleware,
+    authorize=lambda token: admin_checker(auth.get_request_user(token)),
+    engine=engine,
+    interval=PROFILER_INTERVAL_MS / 1000,
+)
+
+if SLOW_QUERY_LOG:
+    slow_query_log = SlowQueryLog(
+        engine, SLOW_QUERY_THRESHOLD_MS / 1000, SLOW_QUERY_EXPLAIN_RATE, QUERY_BUDGET
+    )
+    app.add_middleware(SlowQueryMiddleware, query_log=slow_query_log)
@@ -21,7 +21,9 @@ if config.config_file_name is not None:
     fileConfig(config.config_file_name)
 
 from auth.tables import User
+from tables.audit import AuditLog
 from tables.cargo import Cargo
+from tables.jobs import Job
 from tables.tariffs import Tariff
 target_metadata = Base.metadata
 
@@ -0,0 +1,134 @@
+"""partition tariffs by date
+
+Revision ID: 10cde2009b12
+Revises: 821e4295b05a
+Create Date: 2026-10-19 13:20:44.912057
+
+"""
+from datetime import date
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '10cde2009b12'
+down_revision: Union[str, None] = '821e4295b05a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+YEARS_AHEAD = 2
+
+INSURED_VALUE_DAILY_VIEW = """
+    CREATE MATERIALIZED VIEW mv_insured_value_daily AS
+    SELECT
+        tariffs.date AS date,
+        count(*) AS cargo_count,
+        sum(cargos.declared_value) AS total_declared_value,
+        sum(cargos.declared_value * tariffs.rate) AS total_premium
+    FROM tariffs
+    JOIN cargo_tariff ON cargo_tariff.tariff_id = tariffs.id
+    JOIN cargos ON cargos.id = cargo_tariff.cargo_id
+    GROUP BY tariffs.date
+"""
+
+
+def create_insured_value_daily_view() -> None:
+    op.execute(INSURED_VALUE_DAILY_VIEW)
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_insured_value_daily_date "
+        "ON mv_insured_value_daily (date)"
+    )
+
+
+def upgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW mv_insured_value_daily")
+    op.drop_constraint('cargo_tariff_tariff_id_fkey', 'cargo_tariff', type_='foreignkey')
+
+    op.rename_table('tariffs', 'tariffs_old')
+    op.execute("ALTER TABLE tariffs_old RENAME CONSTRAINT tariffs_pkey TO tariffs_old_pkey")
+    op.execute("ALTER TABLE tariffs_old RENAME CONSTRAINT tariffs_date_key TO tariffs_old_date_key")
+    op.execute("ALTER TABLE tariffs_old ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE tariffs_id_seq OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE tariffs (
+            id INTEGER NOT NULL DEFAULT nextval('tariffs_id_seq'),
+            date DATE NOT NULL,
+            rate FLOAT NOT NULL,
+            CONSTRAINT tariffs_pkey PRIMARY KEY (id, date),
+            CONSTRAINT tariffs_date_key UNIQUE (date)
+        ) PARTITION BY RANGE (date)
+        """
+    )
+    op.execute("ALTER SEQUENCE tariffs_id_seq OWNED BY tariffs.id")
+
+    min_year, max_year = op.get_bind().execute(
+        sa.text(
+            "SELECT extract(year FROM min(date))::int, extract(year FROM max(date))::int "
+            "FROM tariffs_old"
+        )
+    ).one()
+    current_year = date.today().year
+    first_year = min(min_year or current_year, current_year)
+    last_year = max(max_year or current_year, current_year + YEARS_AHEAD)
+
+    for year in range(first_year, last_year + 1):
+        op.execute(
+            f"CREATE TABLE tariffs_y{year} PARTITION OF tariffs "
+            f"FOR VALUES FROM ('{year}-01-01') TO ('{year + 1}-01-01')"
+        )
+    # Rows outside the yearly partitions are kept instead of failing the insert
+    op.execute("CREATE TABLE tariffs_default PARTITION OF tariffs DEFAULT")
+
+    op.execute("INSERT INTO tariffs (id, date, rate) SELECT id, date, rate FROM tariffs_old")
+
+    op.add_column('cargo_tariff', sa.Column('tariff_date', sa.Date(), nullable=True))
+    op.execute(
+        "UPDATE cargo_tariff SET tariff_date = tariffs_old.date "
+        "FROM tariffs_old WHERE tariffs_old.id = cargo_tariff.tariff_id"
+    )
+    op.alter_column('cargo_tariff', 'tariff_date', nullable=False)
+    op.create_foreign_key(
+        'cargo_tariff_tariff_fkey', 'cargo_tariff', 'tariffs',
+        ['tariff_id', 'tariff_date'], ['id', 'date'],
+        ondelete='CASCADE', onupdate='CASCADE',
+    )
+
+    op.drop_table('tariffs_old')
+    create_insured_value_daily_view()
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW mv_insured_value_daily")
+    op.drop_constraint('cargo_tariff_tariff_fkey', 'cargo_tariff', type_='foreignkey')
+
+    op.rename_table('tariffs', 'tariffs_partitioned')
+    op.execute("ALTER TABLE tariffs_partitioned RENAME CONSTRAINT tariffs_pkey TO tariffs_partitioned_pkey")
+    op.execute("ALTER TABLE tariffs_partitioned RENAME CONSTRAINT tariffs_date_key TO tariffs_partitioned_date_key")
+    op.execute("ALTER TABLE tariffs_partitioned ALTER COLUMN id DROP DEFAULT")
+    op.execute("ALTER SEQUENCE tariffs_id_seq OWNED BY NONE")
+
+    op.execute(
+        """
+        CREATE TABLE tariffs (
+            id INTEGER NOT NULL DEFAULT nextval('tariffs_id_seq'),
+            date DATE NOT NULL,
+            rate FLOAT NOT NULL,
+            CONSTRAINT tariffs_pkey PRIMARY KEY (id),
+            CONSTRAINT tariffs_date_key UNIQUE (date)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE tariffs_id_seq OWNED BY tariffs.id")
+    op.execute("INSERT INTO tariffs (id, date, rate) SELECT id, date, rate FROM tariffs_partitioned")
+    op.drop_table('tariffs_partitioned')
+
+    op.drop_column('cargo_tariff', 'tariff_date')
+    op.create_foreign_key(
+        'cargo_tariff_tariff_id_fkey', 'cargo_tariff', 'tariffs',
+        ['tariff_id'], ['id'], ondelete='CASCADE',
+    )
+    create_insured_value_daily_view()
@@ -0,0 +1,105 @@
+"""notify tariffs changed
+
+Revision ID: 9b2f6d84e7a1
+Revises: 5e0b7a3c91d4
+Create Date: 2026-10-19 18:42:37.281954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b2f6d84e7a1'
+down_revision: Union[str, None] = '5e0b7a3c91d4'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Tables whose writes change cached rates, with the tariff date column
+DATE_TABLES = {'tariffs': 'date', 'cargo_tariff': 'tariff_date'}
+TRANSITION_TABLES = {
+    'insert': 'NEW TABLE AS new_rows',
+    'update': 'OLD TABLE AS old_rows NEW TABLE AS new_rows',
+    'delete': 'OLD TABLE AS old_rows',
+}
+
+# The payload carries the changed date range, so listeners evict only it
+NOTIFY_TARIFF_DATES = """
+    CREATE FUNCTION notify_tariff_dates() RETURNS trigger AS $$
+    DECLARE
+        changed_rows text;
+        date_from date;
+        date_to date;
+    BEGIN
+        changed_rows := CASE TG_OP
+            WHEN 'INSERT' THEN format('SELECT %1$I FROM new_rows', TG_ARGV[0])
+            WHEN 'DELETE' THEN format('SELECT %1$I FROM old_rows', TG_ARGV[0])
+            ELSE format(
+                'SELECT %1$I FROM old_rows UNION ALL SELECT %1$I FROM new_rows',
+                TG_ARGV[0]
+            )
+        END;
+
+        EXECUTE format(
+            'SELECT min(%1$I), max(%1$I) FROM (%2$s) changed', TG_ARGV[0], changed_rows
+        ) INTO date_from, date_to;
+
+        IF date_from IS NOT NULL THEN
+            PERFORM pg_notify('tariffs_changed', json_build_object(
+                'table', TG_TABLE_NAME, 'date_from', date_from, 'date_to', date_to
+            )::text);
+        END IF;
+
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+# Cargo writes and truncates carry only the table name
+NOTIFY_TABLE_CHANGED = """
+    CREATE FUNCTION notify_tariffs_changed() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify(
+            'tariffs_changed', json_build_object('table', TG_TABLE_NAME)::text
+        );
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+"""
+
+
+def upgrade() -> None:
+    op.execute(NOTIFY_TARIFF_DATES)
+    op.execute(NOTIFY_TABLE_CHANGED)
+
+    for table, column in DATE_TABLES.items():
+        for event, transition_tables in TRANSITION_TABLES.items():
+            op.execute(
+                f"CREATE TRIGGER {table}_notify_{event} "
+                f"AFTER {event.upper()} ON {table} "
+                f"REFERENCING {transition_tables} "
+                f"FOR EACH STATEMENT EXECUTE FUNCTION notify_tariff_dates('{column}')"
+            )
+
+        op.execute(
+            f"CREATE TRIGGER {table}_notify_truncate AFTER TRUNCATE ON {table} "
+            f"FOR EACH STATEMENT EXECUTE FUNCTION notify_tariffs_changed()"
+        )
+
+    op.execute(
+        "CREATE TRIGGER cargos_notify_changed "
+        "AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON cargos "
+        "FOR EACH STATEMENT EXECUTE FUNCTION notify_tariffs_changed()"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP TRIGGER cargos_notify_changed ON cargos")
+
+    for table in DATE_TABLES:
+        for event in [*TRANSITION_TABLES, 'truncate']:
+            op.execute(f"DROP TRIGGER {table}_notify_{event} ON {table}")
+
+    op.execute("DROP FUNCTION notify_tariffs_changed()")
+    op.execute("DROP FUNCTION notify_tariff_dates()")
@@ -0,0 +1,31 @@
+"""cascade cargo tariff deletes
+
+Revision ID: a92f4e1a4f16
+Revises: 70d2c6fbc92d
+Create Date: 2026-10-19 11:48:05.127394
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a92f4e1a4f16'
+down_revision: Union[str, None] = '70d2c6fbc92d'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.drop_constraint('cargo_tariff_cargo_id_fkey', 'cargo_tariff', type_='foreignkey')
+    op.drop_constraint('cargo_tariff_tariff_id_fkey', 'cargo_tariff', type_='foreignkey')
+    op.create_foreign_key('cargo_tariff_cargo_id_fkey', 'cargo_tariff', 'cargos', ['cargo_id'], ['id'], ondelete='CASCADE')
+    op.create_foreign_key('cargo_tariff_tariff_id_fkey', 'cargo_tariff', 'tariffs', ['tariff_id'], ['id'], ondelete='CASCADE')
+
+
+def downgrade() -> None:
+    op.drop_constraint('cargo_tariff_tariff_id_fkey', 'cargo_tariff', type_='foreignkey')
+    op.drop_constraint('cargo_tariff_cargo_id_fkey', 'cargo_tariff', type_='foreignkey')
+    op.create_foreign_key('cargo_tariff_tariff_id_fkey', 'cargo_tariff', 'tariffs', ['tariff_id'], ['id'])
+    op.create_foreign_key('cargo_tariff_cargo_id_fkey', 'cargo_tariff', 'cargos', ['cargo_id'], ['id'])
@@ -0,0 +1,45 @@
+"""insured value daily view
+
+Revision ID: b579c3b85bc0
+Revises: b3950f3250de
+Create Date: 2026-10-19 10:12:41.318205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b579c3b85bc0'
+down_revision: Union[str, None] = 'b3950f3250de'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index('ix_cargo_tariff_tariff_id', 'cargo_tariff', ['tariff_id'], unique=False)
+    op.execute(
+        """
+        CREATE MATERIALIZED VIEW mv_insured_value_daily AS
+        SELECT
+            tariffs.date AS date,
+            count(*) AS cargo_count,
+            sum(cargos.declared_value) AS total_declared_value,
+            sum(cargos.declared_value * tariffs.rate) AS total_premium
+        FROM tariffs
+        JOIN cargo_tariff ON cargo_tariff.tariff_id = tariffs.id
+        JOIN cargos ON cargos.id = cargo_tariff.cargo_id
+        GROUP BY tariffs.date
+        """
+    )
+    # REFRESH ... CONCURRENTLY requires a unique index on the view
+    op.execute(
+        "CREATE UNIQUE INDEX ix_mv_insured_value_daily_date "
+        "ON mv_insured_value_daily (date)"
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP MATERIALIZED VIEW mv_insured_value_daily")
+    op.drop_index('ix_cargo_tariff_tariff_id', table_name='cargo_tariff')
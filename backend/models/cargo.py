@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic import BaseModel
 
 
@@ -17,3 +19,7 @@ class CargoReadModel(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class CargoBulkModel(BaseModel):
+    cargos: List[CargoModel]
@@ -0,0 +1,29 @@
+import datetime
+from typing import Any, Optional
+
+from pydantic import BaseModel
+
+
+class JobModel(BaseModel):
+    type: str
+    params: dict = {}
+
+
+class JobReadModel(BaseModel):
+    id: int
+
+    type: str
+    params: dict
+    status: str
+    progress: float
+    attempts: int = 0
+
+    result: Optional[Any] = None
+    error: Optional[str] = None
+
+    created_at: Optional[datetime.datetime] = None
+    started_at: Optional[datetime.datetime] = None
+    finished_at: Optional[datetime.datetime] = None
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,15 @@
+import datetime
+from typing import Optional
+
+from pydantic import BaseModel, Field
+
+BUCKET_PATTERN = "^(day|week|month|quarter|year)$"
+
+
+class ReportModel(BaseModel):
+    bucket: str = Field("day", pattern=BUCKET_PATTERN)
+
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+
+    cargo_type: Optional[str] = None
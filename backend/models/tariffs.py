@@ -1,8 +1,9 @@
 import datetime
-from typing import Optional, List
+from typing import Literal, Optional, List
 
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 
+from config.settings import TARIFF_BULK_DELETE_MAX_IDS
 from models.cargo import CargoReadModel, CargoModel
 
 
@@ -18,6 +19,33 @@ class TariffUpdateModel(BaseModel):
     rate: Optional[float] = None
 
 
+class TariffAdjustModel(BaseModel):
+    date_from: datetime.date
+    date_to: datetime.date
+
+    mode: Literal["multiply", "add"]
+    value: float
+
+    cargo_type: Optional[str] = None
+
+    @model_validator(mode="after")
+    def check_adjustment(self):
+        if self.date_from > self.date_to:
+            raise ValueError("Дата начала позже даты окончания")
+
+        if self.mode == "multiply" and self.value <= 0:
+            raise ValueError("Множитель должен быть положительным")
+
+        return self
+
+
+class TariffBulkDeleteModel(BaseModel):
+    ids: Optional[List[int]] = Field(None, max_length=TARIFF_BULK_DELETE_MAX_IDS)
+
+    date_from: Optional[datetime.date] = None
+    date_to: Optional[datetime.date] = None
+
+
 class TariffReadModel(BaseModel):
     id: int
 
@@ -28,3 +56,15 @@ class TariffReadModel(BaseModel):
 
     class Config:
         from_attributes = True
+
+
+class TariffSparseModel(BaseModel):
+    id: Optional[int] = None
+
+    date: Optional[datetime.date] = None
+    rate: Optional[float] = None
+
+    cargos: Optional[List[CargoReadModel]] = None
+
+    class Config:
+        from_attributes = True
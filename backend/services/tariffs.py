@@ -0,0 +1,104 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from config.kafka_producer import KafkaProducer
+from config.settings import (
+    KAFKA_BROKER_URL,
+    KAFKA_COMPRESSION,
+    KAFKA_SERIALIZER,
+    KAFKA_TOPIC,
+)
+from core.sqlalchemy.crud import Crud
+from core.sqlalchemy.orm import Orm
+from models.tariffs import TariffAdjustModel, TariffBulkDeleteModel
+from tables.cargo import Cargo
+from tables.tariffs import Tariff, cargo_tariff_association
+
+crud = Crud(Tariff)
+
+producer = KafkaProducer(
+    KAFKA_BROKER_URL, KAFKA_TOPIC, KAFKA_SERIALIZER, KAFKA_COMPRESSION
+)
+# Callables the API process registers to get every published event
+tariff_event_listeners = []
+
+
+def publish_tariff_event(message: dict, key=None):
+    producer.send_message(message, key=key)
+
+    for listener in tariff_event_listeners:
+        listener(message)
+
+
+async def adjust_tariff_rates(
+    data: TariffAdjustModel, session: AsyncSession, user_id: str
+):
+    filters = [Tariff.date.between(data.date_from, data.date_to)]
+
+    if data.cargo_type:
+        filters += [
+            Tariff.id == cargo_tariff_association.c.tariff_id,
+            Cargo.id == cargo_tariff_association.c.cargo_id,
+            Cargo.type == data.cargo_type,
+        ]
+
+    if data.mode == "add" and data.value < 0:
+        lowest_rate = await session.scalar(
+            select(func.min(Tariff.rate)).where(and_(*filters))
+        )
+
+        if lowest_rate is not None and lowest_rate + data.value <= 0:
+            raise HTTPException(400, "Ставка тарифа должна оставаться положительной")
+
+    if data.mode == "multiply":
+        rate = Tariff.rate * data.value
+    else:
+        rate = Tariff.rate + data.value
+
+    updated_count = await Orm.update_field(
+        Tariff, {"rate": rate}, session, and_(*filters)
+    )
+
+    publish_tariff_event(
+        {
+            "user_id": user_id,
+            "action": "ADJUST_TARIFFS",
+            "timestamp": datetime.now().isoformat(),
+            "adjustment": data.model_dump(mode="json"),
+            "updated_count": updated_count,
+        }
+    )
+
+    return updated_count
+
+
+async def delete_tariffs_bulk(
+    data: TariffBulkDeleteModel, session: AsyncSession, user_id: str
+):
+    if not data.ids and not data.date_from and not data.date_to:
+        raise HTTPException(400, "Укажите ID тарифов или диапазон дат")
+
+    filters = []
+    if data.date_from:
+        filters.append(Tariff.date >= data.date_from)
+    if data.date_to:
+        filters.append(Tariff.date <= data.date_to)
+
+    deleted_ids = await crud.delete_bulk(
+        session, data.ids, and_(*filters) if filters else None
+    )
+
+    publish_tariff_event(
+        {
+            "user_id": user_id,
+            "action": "DELETE_TARIFFS",
+            "timestamp": datetime.now().isoformat(),
+            "filter": data.model_dump(mode="json"),
+            "deleted_count": len(deleted_ids),
+        }
+    )
+
+    return len(deleted_ids)
@@ -1,2 +1,4 @@
+from .audit import AuditLog
 from .cargo import Cargo
+from .jobs import Job
 from .tariffs import Tariff
@@ -0,0 +1,34 @@
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    DateTime,
+    Integer,
+    String,
+    UniqueConstraint,
+    func,
+)
+from sqlalchemy.dialects.postgresql import JSONB
+
+from config.database_conf import Base
+
+
+class AuditLog(Base):
+    __tablename__ = "audit_log"
+
+    id = Column(Integer, primary_key=True)
+
+    user_id = Column(String)
+    action = Column(String, nullable=False, index=True)
+    tariff_id = Column(Integer, index=True)
+    payload = Column(JSONB, nullable=False)
+
+    event_timestamp = Column(DateTime)
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+
+    topic = Column(String, nullable=False)
+    partition = Column(Integer, nullable=False)
+    offset = Column(BigInteger, nullable=False)
+
+    __table_args__ = (
+        UniqueConstraint("topic", "partition", "offset", name="unique_audit_offset"),
+    )
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float
+from sqlalchemy import Column, Float, Index, Integer, String
 from sqlalchemy.orm import relationship
 
 from config.database_conf import Base
@@ -7,6 +7,14 @@ from tables.tariffs import cargo_tariff_association
 
 class Cargo(Base):
     __tablename__ = "cargos"
+    __table_args__ = (
+        Index(
+            "ix_cargos_type_trgm",
+            "type",
+            postgresql_using="gin",
+            postgresql_ops={"type": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
 
@@ -16,5 +24,7 @@ class Cargo(Base):
     tariffs = relationship(
         "Tariff",
         secondary=cargo_tariff_association,
-        back_populates="cargos"
+        back_populates="cargos",
+        passive_deletes=True,
+        lazy="raise",
     )
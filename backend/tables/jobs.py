@@ -0,0 +1,28 @@
+from sqlalchemy import Column, DateTime, Float, Index, Integer, String, Text, func
+from sqlalchemy.dialects.postgresql import JSONB
+
+from config.database_conf import Base
+
+
+class Job(Base):
+    __tablename__ = "jobs"
+
+    id = Column(Integer, primary_key=True)
+
+    type = Column(String, nullable=False)
+    params = Column(JSONB, nullable=False, default=dict)
+    user_id = Column(String)
+
+    status = Column(String, nullable=False, default="queued")
+    progress = Column(Float, nullable=False, default=0)
+    attempts = Column(Integer, nullable=False, default=0)
+
+    result = Column(JSONB)
+    error = Column(Text)
+
+    created_at = Column(DateTime, nullable=False, server_default=func.now())
+    started_at = Column(DateTime)
+    finished_at = Column(DateTime)
+    locked_until = Column(DateTime)
+
+    __table_args__ = (Index("ix_jobs_status_id", "status", "id"),)
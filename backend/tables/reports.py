@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Date, Float, Integer, MetaData, Table
+
+from config.database_conf import SessionLocal
+from core.sqlalchemy.matview import MaterializedView
+
+# Materialized views are created by migrations, so they are kept out of Base.metadata
+views_metadata = MetaData()
+
+insured_value_daily = Table(
+    "mv_insured_value_daily",
+    views_metadata,
+    Column("date", Date, primary_key=True),
+    Column("cargo_count", Integer),
+    Column("total_declared_value", Float),
+    Column("total_premium", Float),
+)
+
+insured_value_daily_view = MaterializedView(insured_value_daily.name, SessionLocal)
@@ -4,6 +4,7 @@ from sqlalchemy import (
     Date,
     Float,
     ForeignKey,
+    ForeignKeyConstraint,
     Table,
     UniqueConstraint,
     String,
@@ -15,22 +16,39 @@ from config.database_conf import Base
 cargo_tariff_association = Table(
     "cargo_tariff",
     Base.metadata,
-    Column("cargo_id", Integer, ForeignKey("cargos.id"), primary_key=True),
-    Column("tariff_id", Integer, ForeignKey("tariffs.id"), primary_key=True),
+    Column(
+        "cargo_id",
+        Integer,
+        ForeignKey("cargos.id", ondelete="CASCADE"),
+        primary_key=True,
+    ),
+    Column("tariff_id", Integer, primary_key=True, index=True),
+    # Partitioned tariffs are unique by (id, date) only, so the date is stored here too
+    Column("tariff_date", Date, nullable=False),
+    ForeignKeyConstraint(
+        ["tariff_id", "tariff_date"],
+        ["tariffs.id", "tariffs.date"],
+        name="cargo_tariff_tariff_fkey",
+        ondelete="CASCADE",
+        onupdate="CASCADE",
+    ),
     UniqueConstraint("cargo_id", "tariff_id", name="unique_cargo_tariff"),
 )
 
 
 class Tariff(Base):
     __tablename__ = "tariffs"
+    __table_args__ = {"postgresql_partition_by": "RANGE (date)"}
 
-    id = Column(Integer, primary_key=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
 
-    date = Column(Date, unique=True, nullable=False)
+    date = Column(Date, primary_key=True, unique=True, nullable=False)
     rate = Column(Float, nullable=False)
 
     cargos = relationship(
         "Cargo",
         secondary=cargo_tariff_association,
-        back_populates="tariffs"
+        back_populates="tariffs",
+        passive_deletes=True,
+        lazy="raise",
     )
@@ -0,0 +1,181 @@
+import asyncio
+import json
+
+from sqlalchemy.dialects import postgresql
+
+from config.kafka_consumer import AuditConsumer
+from config.kafka_producer import JsonSerializer, MsgpackSerializer
+from core.utils.metrics import metrics, serve_metrics
+
+
+class FakeMessage:
+    def __init__(self, value, offset, serializer=JsonSerializer, error=None):
+        self._value = serializer.dumps(value) if isinstance(value, dict) else value
+        self._offset = offset
+        self._error = error
+        self._headers = [("content_type", serializer.content_type.encode())]
+
+    def value(self):
+        return self._value
+
+    def headers(self):
+        return self._headers
+
+    def error(self):
+        return self._error
+
+    def topic(self):
+        return "tariffs"
+
+    def partition(self):
+        return 0
+
+    def offset(self):
+        return self._offset
+
+
+class FakePartition:
+    def __init__(self, offset):
+        self.partition = 0
+        self.offset = offset
+
+
+class FakeConsumer:
+    def __init__(self, batches, high=10):
+        self.batches = list(batches)
+        self.high = high
+        self.position_offset = -1
+        self.commits = 0
+        self.closed = False
+
+    def consume(self, num_messages, timeout):
+        batch = self.batches.pop(0) if self.batches else []
+
+        if batch:
+            self.position_offset = batch[-1].offset() + 1
+
+        return batch[:num_messages]
+
+    def commit(self, asynchronous=True):
+        self.commits += 1
+
+    def assignment(self):
+        return [FakePartition(self.position_offset)]
+
+    def position(self, partitions):
+        return partitions
+
+    def get_watermark_offsets(self, partition, cached=False):
+        return 0, self.high
+
+    def close(self):
+        self.closed = True
+
+
+class FakeSession:
+    def __init__(self, statements):
+        self.statements = statements
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+
+    async def commit(self):
+        pass
+
+
+def get_saved_offsets(stmt):
+    params = stmt.compile(dialect=postgresql.dialect()).params
+    return sorted(value for key, value in params.items() if key.startswith("offset"))
+
+
+def get_event(action, tariff_id):
+    return {
+        "user_id": 1,
+        "action": action,
+        "tariff_id": tariff_id,
+        "timestamp": "2024-01-01T00:00:00",
+    }
+
+
+def test_batch_is_saved_before_offsets_are_committed():
+    statements = []
+    consumer = FakeConsumer(
+        [
+            [
+                FakeMessage(get_event("create", 1), 3),
+                FakeMessage(get_event("update", 1), 4, MsgpackSerializer),
+                FakeMessage(b"not json", 5),
+                FakeMessage(None, 6, error="broker down"),
+            ]
+        ]
+    )
+    audit_consumer = AuditConsumer(consumer, lambda: FakeSession(statements))
+    events_before = metrics.counters["audit_consumer_events_total"]
+    invalid_before = metrics.counters["audit_consumer_invalid_total"]
+
+    consumed = asyncio.run(audit_consumer.consume_batch())
+
+    assert consumed == 3
+    assert len(statements) == 1
+    assert get_saved_offsets(statements[0]) == [3, 4]
+    assert consumer.commits == 1
+    assert metrics.counters["audit_consumer_events_total"] - events_before == 2
+    assert metrics.counters["audit_consumer_invalid_total"] - invalid_before == 1
+    assert metrics.gauges['audit_consumer_lag{partition="0"}'] == 3
+
+
+def test_empty_batch_commits_nothing():
+    statements = []
+    consumer = FakeConsumer([[]])
+    audit_consumer = AuditConsumer(consumer, lambda: FakeSession(statements))
+
+    assert asyncio.run(audit_consumer.consume_batch()) == 0
+    assert statements == []
+    assert consumer.commits == 0
+
+
+def test_run_closes_consumer_on_stop():
+    consumer = FakeConsumer([[FakeMessage(get_event("delete", 2), 0)]])
+    audit_consumer = AuditConsumer(consumer, lambda: FakeSession([]))
+
+    async def consume_until_stopped():
+        task = asyncio.create_task(audit_consumer.run())
+
+        while consumer.commits == 0:
+            await asyncio.sleep(0.01)
+
+        audit_consumer.stop()
+        await task
+
+    asyncio.run(consume_until_stopped())
+
+    assert consumer.closed
+
+
+def test_metrics_are_served_over_http():
+    async def fetch_metrics():
+        server = await serve_metrics(0, "127.0.0.1")
+        port = server.sockets[0].getsockname()[1]
+
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            response = await reader.read()
+            writer.close()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+        return response
+
+    metrics.inc("audit_consumer_events_total", 0)
+    headers, _, body = asyncio.run(fetch_metrics()).partition(b"\r\n\r\n")
+
+    assert headers.startswith(b"HTTP/1.1 200 OK")
+    assert "audit_consumer_events_total" in json.loads(body)["counters"]
@@ -0,0 +1,36 @@
+import asyncio
+import time
+from datetime import timedelta
+
+import httpx
+import jwt
+from fastapi import FastAPI
+
+from auth.conf import auth
+from auth.views import auth_router
+
+
+async def post(app, url, refresh_token):
+    transport = httpx.ASGITransport(app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.post(url, json={"refresh_token": refresh_token})
+
+
+def test_refresh_is_rejected_after_logout(monkeypatch):
+    monkeypatch.setattr(auth, "secret_key", "secret")
+    app = FastAPI()
+    app.include_router(auth_router, prefix="/auth")
+    refresh_token = auth.get_refresh_token({"sub": "user@test.com", "role": "user"})
+
+    assert asyncio.run(post(app, "/auth/refresh/", refresh_token)).status_code == 200
+    assert asyncio.run(post(app, "/auth/logout/", refresh_token)).status_code == 204
+    assert asyncio.run(post(app, "/auth/refresh/", refresh_token)).status_code == 401
+
+
+def test_token_expires_after_delta_in_utc(monkeypatch):
+    monkeypatch.setattr(auth, "secret_key", "secret")
+    token = auth.create_jwt_token({"sub": "user@test.com"}, timedelta(minutes=5))
+    payload = jwt.decode(token, auth.secret_key, algorithms=[auth.algorithm])
+
+    assert abs(payload["exp"] - (time.time() + 300)) < 5
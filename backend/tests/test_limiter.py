@@ -0,0 +1,96 @@
+import asyncio
+
+import httpx
+from fastapi import Depends, FastAPI, Request
+
+from core.fastapi.limiter import ConcurrencyLimiter, LimitedStreamingResponse
+
+
+def create_app():
+    limiter = ConcurrencyLimiter(max_concurrent=1)
+    app = FastAPI()
+    held = []
+
+    async def stream_rows():
+        for row in range(3):
+            await asyncio.sleep(0)
+            held.append(limiter.limits["/rows/"].semaphore.locked())
+            yield f"{row}\n"
+
+    @app.get("/rows/", dependencies=[Depends(limiter)])
+    async def get_rows(request: Request, fail: bool = False):
+        response = LimitedStreamingResponse(request, stream_rows())
+
+        if fail:
+            raise RuntimeError("failed after creating the response")
+
+        return response
+
+    return app, limiter, held
+
+
+def get_semaphore(limiter):
+    return limiter.limits["/rows/"].semaphore
+
+
+async def request_rows(app, **params):
+    transport = httpx.ASGITransport(app, raise_app_exceptions=False)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/rows/", params=params)
+
+
+def test_slot_is_held_until_the_body_is_sent():
+    app, limiter, held = create_app()
+
+    response = asyncio.run(request_rows(app))
+
+    assert response.text == "0\n1\n2\n"
+    assert held == [True, True, True]
+    assert not get_semaphore(limiter).locked()
+
+
+def test_slot_is_released_when_the_handler_fails():
+    app, limiter, held = create_app()
+
+    response = asyncio.run(request_rows(app, fail=True))
+
+    assert response.status_code == 500
+    assert held == []
+    assert not get_semaphore(limiter).locked()
+
+
+def test_slot_is_released_when_the_client_disconnects():
+    app, limiter, held = create_app()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": "/rows/",
+        "raw_path": b"/rows/",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [],
+        "server": ("test", 80),
+        "client": ("test", 1),
+    }
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            raise OSError("connection reset")
+
+    async def call_app():
+        # The send error reaches the server wrapped in an exception group
+        try:
+            await app(scope, receive, send)
+        except Exception:
+            pass
+
+    asyncio.run(call_app())
+
+    assert not get_semaphore(limiter).locked()
@@ -0,0 +1,41 @@
+import asyncio
+import re
+from datetime import date
+
+import pytest
+from sqlalchemy import and_, text
+from sqlalchemy.dialects import postgresql
+
+pytestmark = pytest.mark.database
+
+
+def get_tariff_rate_plan(tariff_date: date):
+    from config.database_conf import SessionLocal, engine
+    from core.sqlalchemy.orm import Orm
+    from tables.cargo import Cargo
+    from tables.tariffs import Tariff
+
+    async def explain():
+        tariff_filter = and_(Tariff.date == tariff_date, Cargo.type == "Glass")
+        query = await Orm.where(
+            Tariff, tariff_filter, None, Tariff.cargos, True, execute=False
+        )
+        sql = query.compile(
+            dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True}
+        )
+
+        try:
+            async with SessionLocal() as session:
+                result = await session.execute(text(f"EXPLAIN {sql}"))
+                return "\n".join(result.scalars())
+        finally:
+            await engine.dispose()
+
+    return asyncio.run(explain())
+
+
+def test_get_tariff_rate_scans_one_partition():
+    plan = get_tariff_rate_plan(date.today())
+
+    assert set(re.findall(r"tariffs_y\d+", plan)) == {f"tariffs_y{date.today().year}"}
+    assert "tariffs_default" not in plan
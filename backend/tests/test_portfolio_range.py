@@ -0,0 +1,38 @@
+import asyncio
+from datetime import date, timedelta
+
+import httpx
+from fastapi import FastAPI
+
+from auth.conf import auth
+from config.database_conf import get_session
+from config.settings import PORTFOLIO_MAX_DAYS
+from views.insurance import insurance_router
+
+
+def get_portfolio(date_from: date, date_to: date):
+    app = FastAPI()
+    app.include_router(insurance_router, prefix="/insurance")
+    app.dependency_overrides[get_session] = lambda: None
+    app.dependency_overrides[auth.get_request_user] = lambda: None
+
+    async def request():
+        transport = httpx.ASGITransport(app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            return await c.get(
+                "/insurance/portfolio/",
+                params={"date_from": date_from, "date_to": date_to},
+            )
+
+    return asyncio.run(request())
+
+
+def test_range_longer_than_limit_is_rejected():
+    date_from = date(2024, 1, 1)
+    response = get_portfolio(date_from, date_from + timedelta(days=PORTFOLIO_MAX_DAYS))
+
+    assert response.status_code == 400
+
+
+def test_reversed_range_is_rejected():
+    assert get_portfolio(date(2024, 2, 1), date(2024, 1, 1)).status_code == 400
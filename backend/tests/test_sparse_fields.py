@@ -0,0 +1,57 @@
+import asyncio
+
+import httpx
+from fastapi import FastAPI
+
+from config.database_conf import get_session
+from views.tariffs import tariffs_router
+
+
+class FakeResult:
+    def scalars(self):
+        return self
+
+    def mappings(self):
+        return self
+
+    def all(self):
+        return []
+
+
+class FakeSession:
+    def __init__(self):
+        self.queries = []
+
+    async def execute(self, query, *args):
+        self.queries.append(query)
+        return FakeResult()
+
+
+def list_tariffs(**params):
+    session = FakeSession()
+    app = FastAPI()
+    app.include_router(tariffs_router, prefix="/tariffs")
+    app.dependency_overrides[get_session] = lambda: session
+
+    async def request():
+        transport = httpx.ASGITransport(app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as c:
+            return await c.get("/tariffs/", params=params)
+
+    assert asyncio.run(request()).status_code == 200
+
+    return session.queries[0]
+
+
+def test_full_representation_is_the_default():
+    query = list_tariffs()
+
+    assert query.column_descriptions[0]["name"] == "Tariff"
+    assert query._with_options
+
+
+def test_fields_select_columns_only():
+    query = list_tariffs(fields="id,rate")
+
+    assert [column["name"] for column in query.column_descriptions] == ["id", "rate"]
+    assert not query._with_options
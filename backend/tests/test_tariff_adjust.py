@@ -0,0 +1,47 @@
+import asyncio
+from datetime import date
+
+import pytest
+from fastapi import HTTPException
+from pydantic import ValidationError
+
+from models.tariffs import TariffAdjustModel
+from services.tariffs import adjust_tariff_rates
+
+
+class FakeSession:
+    def __init__(self, lowest_rate):
+        self.lowest_rate = lowest_rate
+
+    async def scalar(self, query):
+        return self.lowest_rate
+
+
+def get_adjustment(**fields):
+    return {
+        "date_from": date(2024, 1, 1),
+        "date_to": date(2024, 12, 31),
+        "mode": "add",
+        "value": 0.01,
+        **fields,
+    }
+
+
+def test_reversed_date_range_is_rejected():
+    with pytest.raises(ValidationError):
+        TariffAdjustModel(**get_adjustment(date_from=date(2025, 1, 1)))
+
+
+@pytest.mark.parametrize("value", [0, -2])
+def test_non_positive_multiplier_is_rejected(value):
+    with pytest.raises(ValidationError):
+        TariffAdjustModel(**get_adjustment(mode="multiply", value=value))
+
+
+def test_negative_shift_below_zero_is_rejected():
+    data = TariffAdjustModel(**get_adjustment(value=-0.05))
+
+    with pytest.raises(HTTPException) as exc_info:
+        asyncio.run(adjust_tariff_rates(data, FakeSession(0.05), "user"))
+
+    assert exc_info.value.status_code == 400
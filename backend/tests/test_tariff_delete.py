@@ -0,0 +1,36 @@
+import asyncio
+from datetime import date
+
+import pytest
+from pydantic import ValidationError
+
+from config.settings import TARIFF_BULK_DELETE_MAX_IDS
+from models.tariffs import TariffBulkDeleteModel
+from services import tariffs
+
+
+def test_too_many_ids_are_rejected():
+    with pytest.raises(ValidationError):
+        TariffBulkDeleteModel(ids=list(range(TARIFF_BULK_DELETE_MAX_IDS + 1)))
+
+
+def test_event_carries_filter_instead_of_deleted_ids(monkeypatch):
+    events = []
+
+    async def delete_bulk(session, ids, filters):
+        return list(range(5000))
+
+    monkeypatch.setattr(tariffs.crud, "delete_bulk", delete_bulk)
+    monkeypatch.setattr(tariffs, "publish_tariff_event", events.append)
+
+    data = TariffBulkDeleteModel(date_from=date(2024, 1, 1))
+    deleted_count = asyncio.run(tariffs.delete_tariffs_bulk(data, None, "user"))
+
+    assert deleted_count == 5000
+    assert events[0]["deleted_count"] == 5000
+    assert events[0]["filter"] == {
+        "ids": None,
+        "date_from": "2024-01-01",
+        "date_to": None,
+    }
+    assert "tariff_ids" not in events[0]
@@ -1,20 +1,83 @@
+from typing import List
+
 from fastapi import APIRouter, Depends
+from fastapi.params import Query
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.conf import AUTH_MODEL, auth
-from config.database_conf import get_session
+from config.database_conf import get_lazy_session, get_session
+from config.tariff_cache import tariff_cache
+from config.tariff_snapshot import tariff_snapshot
 from core.sqlalchemy.crud import Crud
-from models.cargo import CargoModel, CargoReadModel
+from models.cargo import CargoBulkModel, CargoModel, CargoReadModel
 from tables.cargo import Cargo
 
 cargo_router = APIRouter()
 crud = Crud(Cargo)
 
 
+def get_search_query(q: str, limit: int):
+    """
+    Method that builds the cargo type search, both conditions are served by
+    the trigram index. Prefix matches come first in alphabetical order, then
+    fuzzy matches by similarity.
+
+    :param:
+    - `q`: searched text
+    - `limit`: maximum number of cargos
+
+    :return:
+        `Select`
+    """
+    is_prefix = Cargo.type.istartswith(q, autoescape=True)
+
+    return (
+        select(Cargo.id, Cargo.type, Cargo.declared_value)
+        .where(is_prefix | Cargo.type.op("%")(q))
+        .order_by(
+            is_prefix.desc(),
+            case((is_prefix, 1), else_=func.similarity(Cargo.type, q)).desc(),
+            func.lower(Cargo.type).collate("C"),
+            Cargo.type.collate("C"),
+        )
+        .limit(limit)
+    )
+
+
 @cargo_router.post("/create/", response_model=CargoReadModel)
 async def create_cargo(
     data: CargoModel,
     session: AsyncSession = Depends(get_session),
     credentials: AUTH_MODEL = Depends(auth.get_request_user),
 ):
-    return await crud.create(data, session)
+    instance = await crud.create(data, session)
+    tariff_cache.evict_cargos()
+    tariff_snapshot.schedule_rebuild()
+
+    return instance
+
+
+@cargo_router.post("/bulk/")
+async def create_cargos_bulk(
+    data: CargoBulkModel,
+    session: AsyncSession = Depends(get_session),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    result = await crud.create_bulk(data, "cargos", session, conflict_fields=["type"])
+    tariff_cache.evict_cargos()
+    tariff_snapshot.schedule_rebuild()
+
+    return result
+
+
+@cargo_router.get("/search/", response_model=List[CargoReadModel])
+async def search_cargos(
+    q: str = Query(min_length=1, max_length=100, description="Тип груза"),
+    limit: int = Query(10, ge=1, le=50, description="Количество"),
+    session: AsyncSession = Depends(get_lazy_session),
+):
+    if (cargos := tariff_cache.search_cargos(q, limit)) is not None:
+        return cargos
+
+    return (await session.execute(get_search_query(q, limit))).mappings().all()
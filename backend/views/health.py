@@ -0,0 +1,14 @@
+from fastapi import APIRouter
+from fastapi.responses import JSONResponse
+
+from config.tariff_cache import tariff_cache
+
+health_router = APIRouter()
+
+
+@health_router.get("/")
+async def health():
+    if not tariff_cache.ready:
+        return JSONResponse(status_code=503, content={"status": "warming up"})
+
+    return {"status": "ready"}
@@ -1,38 +1,185 @@
-from fastapi import APIRouter, HTTPException
+from datetime import date
+from io import BytesIO
+
+import numpy as np
+from fastapi import APIRouter, HTTPException, Response
 from fastapi.params import Query, Depends
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.conf import AUTH_MODEL, auth
-from config.database_conf import get_session
-from config.settings import MAIN_URL
+from config.database_conf import get_lazy_session, get_session
+from config.settings import MAIN_URL, PORTFOLIO_MAX_DAYS
+from config.tariff_cache import tariff_cache
 from core.httpx.request import send_request
-from core.sqlalchemy.orm import Orm
+from core.utils.singleflight import SingleFlight
 from tables.cargo import Cargo
+from tables.tariffs import Tariff, cargo_tariff_association
 
 insurance_router = APIRouter()
+cargo_flight = SingleFlight()
 
 
 @insurance_router.get("/get_insurance/")
 async def get_insurance(
     date: str = Query(description="Дата"),
     cargo_type: str = Query(description="Тип груза"),
+    session: AsyncSession = Depends(get_lazy_session),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    declared_value = tariff_cache.get_declared_value(cargo_type)
+
+    if declared_value is None:
+        # The connection is returned to the pool before the outbound request
+        async with session.begin():
+            declared_value = await cargo_flight.do(
+                cargo_type,
+                lambda: session.scalar(
+                    select(Cargo.declared_value).where(Cargo.type == cargo_type)
+                ),
+            )
+
+        if declared_value is None:
+            raise HTTPException(400, "Указанного груза нет в базе данных")
+
+    rate = tariff_cache.get_rate(date, cargo_type)
+
+    if rate is None:
+        response, status_code = await send_request(
+            f"{MAIN_URL}/tariffs/get_tariff_rate/",
+            params={"date": date, "cargo_type": cargo_type},
+        )
+        print(response)
+        if status_code != 200:
+            return response
+
+        rate = float(response["rate"])
+
+    return {"Стоимость страхования": round(declared_value * rate, 2)}
+
+
+def split_float(values: np.ndarray):
+    scaled = 134217729.0 * values
+    high = scaled - (scaled - values)
+
+    return high, values - high
+
+
+def round_like_builtin(values: np.ndarray, digits: int = 2):
+    """
+    Vectorized equivalent of the builtin round(value, digits).
+
+    np.round rounds the already inexact `value * 10**digits`, so values like
+    2.675 end up 2.68 instead of 2.67. Here the rounding error of the scaling
+    is computed exactly and used to break the ties it produces.
+    """
+    factor = 10.0**digits
+    scaled = values * factor
+
+    values_high, values_low = split_float(values)
+    factor_high, factor_low = split_float(np.float64(factor))
+    error = (
+        (values_high * factor_high - scaled)
+        + values_high * factor_low
+        + values_low * factor_high
+    ) + values_low * factor_low
+
+    floor = np.floor(scaled)
+    rounded = np.rint(scaled)
+
+    false_tie = (scaled - floor == 0.5) & (error != 0)
+    rounded = np.where(false_tie, np.where(error > 0, floor + 1, floor), rounded)
+
+    return rounded / factor
+
+
+async def get_portfolio_arrays(date_from: date, date_to: date, session: AsyncSession):
+    cargo_query = select(Cargo.id, Cargo.type, Cargo.declared_value).order_by(Cargo.id)
+    rate_query = (
+        select(cargo_tariff_association.c.cargo_id, Tariff.date, Tariff.rate)
+        .join(
+            cargo_tariff_association,
+            Tariff.id == cargo_tariff_association.c.tariff_id,
+        )
+        .where(Tariff.date.between(date_from, date_to))
+    )
+
+    # Both reads see one snapshot, so every rate belongs to a loaded cargo
+    await session.connection(execution_options={"isolation_level": "REPEATABLE READ"})
+    cargo_rows = (await session.execute(cargo_query)).all()
+    rate_rows = (await session.execute(rate_query)).all()
+
+    cargo_ids = np.array([row.id for row in cargo_rows], dtype=np.int64)
+    cargo_types = np.array([row.type for row in cargo_rows], dtype=str)
+    declared_values = np.array(
+        [row.declared_value for row in cargo_rows], dtype=np.float64
+    )
+
+    rate_cargo_ids = np.array([row.cargo_id for row in rate_rows], dtype=np.int64)
+    rate_dates = np.array([row.date for row in rate_rows], dtype="datetime64[D]")
+    rates = np.array([row.rate for row in rate_rows], dtype=np.float64)
+
+    # A session begun by the caller keeps its isolation level, drop rates of
+    # cargos deleted between the two reads instead of indexing past them
+    known = np.isin(rate_cargo_ids, cargo_ids)
+    rate_cargo_ids, rate_dates, rates = (
+        rate_cargo_ids[known],
+        rate_dates[known],
+        rates[known],
+    )
+
+    dates, date_index = np.unique(rate_dates, return_inverse=True)
+    cargo_index = np.searchsorted(cargo_ids, rate_cargo_ids)
+
+    rate_matrix = np.full((len(cargo_ids), len(dates)), np.nan)
+    rate_matrix[cargo_index, date_index] = rates
+
+    premiums = round_like_builtin(declared_values[:, None] * rate_matrix)
+
+    return cargo_ids, cargo_types, dates, premiums
+
+
+@insurance_router.get("/portfolio/")
+async def get_portfolio_insurance(
+    date_from: date = Query(description="Дата начала"),
+    date_to: date = Query(description="Дата окончания"),
+    output_format: str = Query(
+        "json", alias="format", pattern="^(json|npz)$", description="Формат ответа"
+    ),
     session: AsyncSession = Depends(get_session),
     credentials: AUTH_MODEL = Depends(auth.get_request_user),
 ):
-    cargo = await Orm.scalar(Cargo, session, Cargo.type == cargo_type)
-    if not cargo:
-        raise HTTPException(400, "Указанного груза нет в базе данных")
+    if date_from > date_to:
+        raise HTTPException(400, "Дата начала позже даты окончания")
+
+    if (date_to - date_from).days >= PORTFOLIO_MAX_DAYS:
+        raise HTTPException(
+            400, f"Диапазон дат не должен превышать {PORTFOLIO_MAX_DAYS} дней"
+        )
 
-    response, status_code = await send_request(
-        f"{MAIN_URL}/tariffs/get_tariff_rate/",
-        params={"date": date, "cargo_type": cargo_type},
+    cargo_ids, cargo_types, dates, premiums = await get_portfolio_arrays(
+        date_from, date_to, session
     )
-    print(response)
-    if status_code != 200:
-        return response
 
-    return {
-        "Стоимость страхования": round(
-            cargo.declared_value * float(response["rate"]), 2
+    if output_format == "npz":
+        buffer = BytesIO()
+        np.savez_compressed(
+            buffer,
+            cargo_ids=cargo_ids,
+            cargo_types=cargo_types,
+            dates=dates,
+            premiums=premiums,
+        )
+
+        return Response(
+            content=buffer.getvalue(),
+            media_type="application/octet-stream",
+            headers={"Content-Disposition": "attachment; filename=portfolio.npz"},
         )
+
+    return {
+        "cargo_ids": cargo_ids.tolist(),
+        "cargo_types": cargo_types.tolist(),
+        "dates": dates.astype(str).tolist(),
+        "premiums": np.where(np.isnan(premiums), None, premiums).tolist(),
     }
@@ -0,0 +1,38 @@
+from fastapi import APIRouter, Depends, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from auth.conf import AUTH_MODEL, auth
+from config.database_conf import get_session
+from core.sqlalchemy.crud import Crud
+from core.sqlalchemy.orm import Orm
+from jobs.handlers import JOB_HANDLERS
+from models.jobs import JobModel, JobReadModel
+from tables.jobs import Job
+
+jobs_router = APIRouter()
+crud = Crud(Job)
+
+
+@jobs_router.post("/", response_model=JobReadModel)
+async def create_job(
+    data: JobModel,
+    session: AsyncSession = Depends(get_session),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    if data.type not in JOB_HANDLERS:
+        raise HTTPException(400, f"Unknown job type {data.type}")
+
+    params_model, _ = JOB_HANDLERS[data.type]
+    params = params_model.model_validate(data.params).model_dump(mode="json")
+
+    job_data = {"type": data.type, "params": params, "user_id": credentials.email}
+    return await Orm.create(Job, job_data, session)
+
+
+@jobs_router.get("/{job_id}/", response_model=JobReadModel)
+async def retrieve_job(
+    job_id: int,
+    session: AsyncSession = Depends(get_session),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    return await crud.retrieve(job_id, session)
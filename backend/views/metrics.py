@@ -0,0 +1,10 @@
+from fastapi import APIRouter
+
+from core.utils.metrics import metrics
+
+metrics_router = APIRouter()
+
+
+@metrics_router.get("/")
+async def get_metrics():
+    return metrics.snapshot()
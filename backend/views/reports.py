@@ -0,0 +1,140 @@
+import json
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Request
+from fastapi.params import Query, Depends
+from sqlalchemy import Date, cast, func, literal, select
+
+from auth.conf import AUTH_MODEL, auth
+from config.database_conf import SessionLocal
+from config.settings import REPORTS_USE_MATVIEW
+from core.fastapi.limiter import LimitedStreamingResponse
+from models.reports import BUCKET_PATTERN
+from tables.cargo import Cargo
+from tables.reports import insured_value_daily
+from tables.tariffs import Tariff, cargo_tariff_association
+
+reports_router = APIRouter()
+
+
+def get_bucket(bucket: str, date_column):
+    # Rendered inline so GROUP BY matches the selected expression
+    bucket_literal = literal(bucket, literal_execute=True)
+    return cast(func.date_trunc(bucket_literal, date_column), Date).label("bucket")
+
+
+def filter_dates(query, date_column, date_from: date = None, date_to: date = None):
+    if date_from:
+        query = query.where(date_column >= date_from)
+
+    if date_to:
+        query = query.where(date_column <= date_to)
+
+    return query
+
+
+def join_tariff_cargos(query):
+    return query.join(
+        cargo_tariff_association, cargo_tariff_association.c.tariff_id == Tariff.id
+    ).join(Cargo, Cargo.id == cargo_tariff_association.c.cargo_id)
+
+
+def get_insured_value_query(bucket: str, date_from: date, date_to: date):
+    if REPORTS_USE_MATVIEW:
+        view = insured_value_daily.c
+        bucket_column = get_bucket(bucket, view.date)
+        query = select(
+            bucket_column,
+            func.sum(view.cargo_count).label("cargo_count"),
+            func.sum(view.total_declared_value).label("total_declared_value"),
+            func.sum(view.total_premium).label("total_premium"),
+        )
+        query = filter_dates(query, view.date, date_from, date_to)
+    else:
+        bucket_column = get_bucket(bucket, Tariff.date)
+        query = join_tariff_cargos(
+            select(
+                bucket_column,
+                func.count().label("cargo_count"),
+                func.sum(Cargo.declared_value).label("total_declared_value"),
+                func.sum(Cargo.declared_value * Tariff.rate).label("total_premium"),
+            ).select_from(Tariff)
+        )
+        query = filter_dates(query, Tariff.date, date_from, date_to)
+
+    return query.group_by(bucket_column).order_by(bucket_column)
+
+
+def get_cargo_rates_query(
+    bucket: str, date_from: date, date_to: date, cargo_type: Optional[str]
+):
+    bucket_column = get_bucket(bucket, Tariff.date)
+    avg_rate = func.avg(Tariff.rate)
+
+    query = join_tariff_cargos(
+        select(
+            Cargo.type.label("cargo_type"),
+            bucket_column,
+            avg_rate.label("avg_rate"),
+            func.min(Tariff.rate).label("min_rate"),
+            func.max(Tariff.rate).label("max_rate"),
+            (
+                avg_rate
+                - func.lag(avg_rate).over(
+                    partition_by=Cargo.type, order_by=bucket_column
+                )
+            ).label("avg_rate_change"),
+        ).select_from(Tariff)
+    )
+    query = filter_dates(query, Tariff.date, date_from, date_to)
+
+    if cargo_type:
+        query = query.where(Cargo.type == cargo_type)
+
+    return query.group_by(Cargo.type, bucket_column).order_by(
+        Cargo.type, bucket_column
+    )
+
+
+async def stream_rows(query):
+    """
+    Streams query rows as NDJSON through a server-side cursor.
+
+    The session is opened here because the response body is sent after
+    request dependencies have been closed.
+    """
+    async with SessionLocal() as session:
+        result = await session.stream(query)
+
+        async for row in result.mappings():
+            yield json.dumps(dict(row), default=str) + "\n"
+
+
+@reports_router.get("/insured_value/")
+async def insured_value_report(
+    request: Request,
+    bucket: str = Query("day", pattern=BUCKET_PATTERN, description="Период"),
+    date_from: Optional[date] = Query(None, description="Дата начала"),
+    date_to: Optional[date] = Query(None, description="Дата окончания"),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    query = get_insured_value_query(bucket, date_from, date_to)
+    return LimitedStreamingResponse(
+        request, stream_rows(query), media_type="application/x-ndjson"
+    )
+
+
+@reports_router.get("/cargo_rates/")
+async def cargo_rates_report(
+    request: Request,
+    bucket: str = Query("month", pattern=BUCKET_PATTERN, description="Период"),
+    date_from: Optional[date] = Query(None, description="Дата начала"),
+    date_to: Optional[date] = Query(None, description="Дата окончания"),
+    cargo_type: Optional[str] = Query(None, description="Тип груза"),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    query = get_cargo_rates_query(bucket, date_from, date_to, cargo_type)
+    return LimitedStreamingResponse(
+        request, stream_rows(query), media_type="application/x-ndjson"
+    )
@@ -1,24 +1,89 @@
+import gzip
 from datetime import datetime, date
+from typing import Optional
 
-from fastapi import APIRouter, HTTPException
-from fastapi.params import Query, Depends
-from sqlalchemy import and_
+from fastapi import APIRouter, HTTPException, Response
+from fastapi.params import Header, Query, Depends
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from auth.conf import AUTH_MODEL, auth
 from config.database_conf import get_session
-from config.kafka_producer import KafkaProducer
-from config.settings import KAFKA_BROKER_URL, KAFKA_TOPIC
-from core.sqlalchemy.crud import Crud
-from core.sqlalchemy.orm import Orm
-from models.tariffs import TariffModel, TariffReadModel, TariffUpdateModel
+from config.kafka_relay import KafkaEventRelay, create_stream_consumer
+from config.settings import (
+    REPORTS_USE_MATVIEW,
+    TARIFF_STREAM_BUFFER,
+    TARIFF_STREAM_HISTORY,
+)
+from config.tariff_cache import tariff_cache
+from config.tariff_snapshot import tariff_snapshot
+from core.fastapi.fields import get_sparse_fields
+from core.utils.event_stream import EventStream
+from core.utils.singleflight import SingleFlight
+from models.tariffs import (
+    TariffAdjustModel,
+    TariffBulkDeleteModel,
+    TariffModel,
+    TariffReadModel,
+    TariffSparseModel,
+    TariffUpdateModel,
+)
+from services.tariffs import (
+    adjust_tariff_rates,
+    crud,
+    delete_tariffs_bulk,
+    publish_tariff_event,
+)
 from tables.cargo import Cargo
+from tables.reports import insured_value_daily_view
 from tables.tariffs import Tariff
 
 tariffs_router = APIRouter()
-crud = Crud(Tariff)
+tariff_rate_flight = SingleFlight()
 
-producer = KafkaProducer(KAFKA_BROKER_URL, KAFKA_TOPIC)
+tariff_events = EventStream("tariffs", TARIFF_STREAM_HISTORY, TARIFF_STREAM_BUFFER)
+
+
+def stream_tariff_event(message: dict):
+    # Stream subscribers don't need to know who made the change
+    tariff_events.publish(
+        message["action"], {k: v for k, v in message.items() if k != "user_id"}
+    )
+
+
+# Feeds the stream with the events of every process when Kafka is configured
+tariff_event_relay = KafkaEventRelay(create_stream_consumer, stream_tariff_event)
+
+
+def send_tariff_event(
+    action: str, credentials: AUTH_MODEL, tariff_id: int, instance=None
+):
+    tariff = (
+        TariffReadModel.model_validate(instance).model_dump(mode="json")
+        if instance is not None
+        else None
+    )
+
+    publish_tariff_event(
+        {
+            "user_id": credentials.email,
+            "action": action,
+            "timestamp": datetime.now().isoformat(),
+            "tariff_id": tariff_id,
+            "tariff": tariff,
+        },
+        key=tariff_id,
+    )
+
+
+def tariffs_changed(**evicted):
+    tariff_cache.evict_rates(**evicted)
+    tariff_cache.schedule_reload()
+    tariff_snapshot.schedule_rebuild()
+
+    if REPORTS_USE_MATVIEW:
+        insured_value_daily_view.schedule_refresh()
 
 
 @tariffs_router.get("/get_tariff_rate/")
@@ -27,23 +92,84 @@ async def get_tariff_rate(
     cargo_type: str = Query(description="Тип груза"),
     session: AsyncSession = Depends(get_session),
 ):
-    tariff_filter = and_(Tariff.date == date, Cargo.type == cargo_type)
-    tariff = await Orm.scalar(Tariff, session, tariff_filter, Tariff.cargos, True)
+    if (rate := tariff_cache.get_rate(date, cargo_type)) is not None:
+        return {"rate": rate}
+
+    # Waiting requests share the plain value, not objects of the leader's session
+    rate_query = (
+        select(Tariff.rate)
+        .join(Tariff.cargos)
+        .where(Tariff.date == date, Cargo.type == cargo_type)
+        .limit(1)
+    )
+    rate = await tariff_rate_flight.do(
+        (date, cargo_type), lambda: session.scalar(rate_query)
+    )
 
-    if not tariff:
+    if rate is None:
         raise HTTPException(400, "Для данной даты/названия грузов не найдено")
 
-    return {"rate": tariff.rate}
+    return {"rate": rate}
+
+
+@tariffs_router.get(
+    "/", response_model=list[TariffSparseModel], response_model_exclude_unset=True
+)
+async def list_tariffs(
+    sparse_fields: dict = Depends(get_sparse_fields),
+    session: AsyncSession = Depends(get_session),
+):
+    return await crud.list(session, Tariff.cargos, **sparse_fields)
+
+
+@tariffs_router.get("/stream/")
+async def stream_tariff_events(
+    last_event_id: Optional[str] = Header(None, description="ID последнего события"),
+):
+    return StreamingResponse(
+        tariff_events.subscribe(last_event_id),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@tariffs_router.get("/snapshot/")
+async def get_tariffs_snapshot(
+    if_none_match: Optional[str] = Header(None, description="ETag снимка"),
+    accept_encoding: Optional[str] = Header(None, description="Кодировки"),
+):
+    snapshot = await tariff_snapshot.get()
+
+    if snapshot is None:
+        raise HTTPException(503, "Снимок тарифов еще не готов")
 
+    headers = {
+        "ETag": snapshot.etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
 
-@tariffs_router.get("/", response_model=list[TariffReadModel])
-async def list_tariffs(session: AsyncSession = Depends(get_session)):
-    return await crud.list(session, Tariff.cargos)
+    if if_none_match and snapshot.etag in if_none_match:
+        return Response(status_code=304, headers=headers)
 
+    if "gzip" in (accept_encoding or ""):
+        headers["Content-Encoding"] = "gzip"
+        body = snapshot.body
+    else:
+        body = gzip.decompress(snapshot.body)
 
-@tariffs_router.get("/{tariff_id}/", response_model=TariffReadModel)
-async def retrieve_tariff(tariff_id: int, session: AsyncSession = Depends(get_session)):
-    return await crud.retrieve(tariff_id, session)
+    return Response(body, media_type="application/json", headers=headers)
+
+
+@tariffs_router.get(
+    "/{tariff_id}/", response_model=TariffSparseModel, response_model_exclude_unset=True
+)
+async def retrieve_tariff(
+    tariff_id: int,
+    sparse_fields: dict = Depends(get_sparse_fields),
+    session: AsyncSession = Depends(get_session),
+):
+    return await crud.retrieve(tariff_id, session, Tariff.cargos, **sparse_fields)
 
 
 @tariffs_router.post("/", response_model=TariffReadModel)
@@ -53,18 +179,25 @@ async def create_tariff(
     credentials: AUTH_MODEL = Depends(auth.get_request_user),
 ):
     instance = await crud.create(data, session, Tariff.cargos)
+    tariffs_changed(dates=[instance.date])
 
-    producer.send_message(
-        {
-            "user_id": credentials.email,
-            "action": "CREATE_TARIFF",
-            "timestamp": datetime.now().isoformat(),
-        }
-    )
+    send_tariff_event("CREATE_TARIFF", credentials, instance.id, instance)
 
     return instance
 
 
+@tariffs_router.post("/adjust/")
+async def adjust_tariffs(
+    data: TariffAdjustModel,
+    session: AsyncSession = Depends(get_session),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    updated_count = await adjust_tariff_rates(data, session, credentials.email)
+    tariffs_changed(date_from=data.date_from, date_to=data.date_to)
+
+    return {"updated": updated_count}
+
+
 @tariffs_router.patch("/{tariff_id}/", response_model=TariffReadModel)
 async def update_tariff(
     tariff_id: int,
@@ -73,32 +206,43 @@ async def update_tariff(
     credentials: AUTH_MODEL = Depends(auth.get_request_user),
 ):
     instance = await crud.update(
-        data.model_dump(exclude_unset=True), tariff_id, session, Tariff.cargos
+        data.model_dump(exclude_unset=True),
+        tariff_id,
+        session,
+        Tariff.cargos,
+        single_statement=True,
     )
+    # The cache still maps the id to the date the tariff had before
+    tariffs_changed(dates=[instance.date], tariff_ids=[tariff_id])
 
-    producer.send_message(
-        {
-            "user_id": credentials.email,
-            "action": "UPDATED_TARIFF",
-            "timestamp": datetime.now().isoformat(),
-        }
-    )
+    send_tariff_event("UPDATED_TARIFF", credentials, instance.id, instance)
 
     return instance
 
 
+@tariffs_router.post("/delete/")
+async def delete_tariffs(
+    data: TariffBulkDeleteModel,
+    session: AsyncSession = Depends(get_session),
+    credentials: AUTH_MODEL = Depends(auth.get_request_user),
+):
+    deleted_count = await delete_tariffs_bulk(data, session, credentials.email)
+    tariffs_changed(
+        tariff_ids=data.ids or [], date_from=data.date_from, date_to=data.date_to
+    )
+
+    return {"deleted": deleted_count}
+
+
 @tariffs_router.delete("/{tariff_id}/")
 async def delete_tariff(
     tariff_id: int,
     session: AsyncSession = Depends(get_session),
     credentials: AUTH_MODEL = Depends(auth.get_request_user),
 ):
-    producer.send_message(
-        {
-            "user_id": credentials.email,
-            "action": "UPDATED_TARIFF",
-            "timestamp": datetime.now().isoformat(),
-        }
-    )
+    response = await crud.delete(tariff_id, session)
+    tariffs_changed(tariff_ids=[tariff_id])
+
+    send_tariff_event("DELETE_TARIFF", credentials, tariff_id)
 
-    return await crud.delete(tariff_id, session)
+    return response